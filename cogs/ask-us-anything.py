@@ -6,6 +6,9 @@ import discord
 import modules.notion as notion
 from datetime import datetime
 import os
+import time
+import asyncio
+import hashlib
 import traceback
 from enum import Enum
 from modules import env
@@ -14,6 +17,13 @@ EMOJI_THUMBS_UP = "👍"
 EMOJI_NOTEPAD = "🗒️"
 EMOJI_CANCEL = "❌"
 
+HISTORY_PAGE_SIZE = 100 # messages per history request
+REACTION_CONCURRENCY = 5
+BACKFILL_QUEUE_SIZE = 50 # analysed messages waiting for their Notion upsert
+BACKFILL_WORKERS = 3
+PROGRESS_INTERVAL = 3 # seconds between edits of the progress message
+EDIT_SETTLE_DELAY = 5 # seconds without further edits before an edited message is synced
+
 class AuaStatus(Enum):
     SEEN = "Gesehen"
     RECORDED = "Aufgenommen"
@@ -40,15 +50,117 @@ emoji_to_status = {
     EMOJI_CANCEL: AuaStatus.REJECTED
 }
 
-async def analyse_reactions(reactions:list[discord.Reaction], aua_managers):
-    for emoji, status in emoji_to_status.items():
-        for reaction in reactions:
-            if str(reaction.emoji) == emoji:
-                # Fetch the users who reacted with the target emoji
-                async for user in reaction.users():
-                    if user.id in aua_managers:
-                        return status
-    return None
+def entry_hash(message_text:str, status:AuaStatus) -> str:
+    # whitespace only edits don't change the entry
+    normalized = " ".join(message_text.split())
+    return hashlib.sha1(f"{status.value}\n{normalized}".encode("utf-8")).hexdigest()
+
+class ReactionIndex:
+    """
+    Which aua managers reacted with which status emoji, per message. It is kept up to date from reaction events,
+    so the users of a message's reactions are only enumerated the first time its status is needed.
+    Like before, the status follows the latest manager reaction. For messages without a reaction seen live, or after
+    the latest reaction was removed, the remaining reactions decide in the order of emoji_to_status.
+    """
+    def __init__(self, aua_managers):
+        self.aua_managers = set(aua_managers)
+        # (message id, emoji) -> ids of managers that reacted
+        self.reactions:dict[tuple[int, str], set[int]] = {}
+        self.seeded:set[int] = set()
+        # message id -> emoji of the latest manager reaction
+        self.latest:dict[int, str] = {}
+
+    def add(self, message_id:int, emoji:str, user_id:int):
+        if emoji not in emoji_to_status or user_id not in self.aua_managers:
+            return
+        self.latest[message_id] = emoji
+        # unseeded messages are enumerated completely on their first lookup anyway
+        if message_id in self.seeded:
+            self.reactions.setdefault((message_id, emoji), set()).add(user_id)
+
+    def remove(self, message_id:int, emoji:str, user_id:int):
+        managers = self.reactions.get((message_id, emoji))
+        if managers:
+            managers.discard(user_id)
+
+    def clear(self, message_id:int, emoji:str|None=None):
+        for status_emoji in emoji_to_status if emoji is None else [emoji]:
+            self.reactions.pop((message_id, status_emoji), None)
+        if emoji is None or self.latest.get(message_id) == emoji:
+            self.latest.pop(message_id, None)
+
+    def forget(self, message_id:int):
+        self.clear(message_id)
+        self.seeded.discard(message_id)
+
+    def mark_seeded(self, message_id:int):
+        self.seeded.add(message_id)
+
+    def status(self, message_id:int) -> AuaStatus|None:
+        latest = self.latest.get(message_id)
+        if latest and self.reactions.get((message_id, latest)):
+            return emoji_to_status[latest]
+        for emoji, status in emoji_to_status.items():
+            if self.reactions.get((message_id, emoji)):
+                return status
+        return None
+
+    async def seed(self, message:discord.Message):
+        """
+        Enumerates the users of the status emoji reactions of message, concurrently.
+        """
+        status_reactions = [reaction for reaction in message.reactions if str(reaction.emoji) in emoji_to_status]
+
+        async def managers_of(reaction:discord.Reaction):
+            return {user.id async for user in reaction.users() if user.id in self.aua_managers}
+
+        managers = await asyncio.gather(*(managers_of(reaction) for reaction in status_reactions))
+        for reaction, reaction_managers in zip(status_reactions, managers):
+            if reaction_managers:
+                self.reactions[(message.id, str(reaction.emoji))] = reaction_managers
+        self.seeded.add(message.id)
+
+    async def get_status(self, message:discord.Message) -> AuaStatus|None:
+        if message.id not in self.seeded:
+            await self.seed(message)
+        return self.status(message.id)
+
+class BackfillProgress:
+    """
+    Counts of a running backfill. Upserts finish out of order, so the checkpoint only moves past a history page
+    once every message of it and of all newer pages has been written.
+    """
+    def __init__(self, limit:int):
+        self.limit = limit
+        self.analysed = 0
+        self.written = 0
+        self.skipped = 0
+        self.failed = 0
+        # [oldest message id, open upserts] per page, newest first
+        self.pages:list[list[int]] = []
+        self.checkpoint:int|None = None
+
+    def add_page(self, oldest_message_id:int, upserts:int) -> list[int]:
+        page = [oldest_message_id, upserts]
+        self.pages.append(page)
+        self.advance()
+        return page
+
+    def upsert_done(self, page:list[int]):
+        page[1] -= 1
+        self.advance()
+
+    def advance(self):
+        while self.pages and self.pages[0][1] == 0:
+            self.checkpoint = self.pages.pop(0)[0]
+            env.AUA_BACKFILL_CHECKPOINT = self.checkpoint
+            env.save_to_env("AUA_BACKFILL_CHECKPOINT", self.checkpoint)
+
+    def __str__(self):
+        text = f"{self.analysed} von {self.limit} Nachrichten analysiert, {self.written} geschrieben, {self.skipped} von Bots übersprungen"
+        if self.failed:
+            text += f", {self.failed} fehlgeschlagen"
+        return text
 
 
 class AskUsAnything(Cog):
@@ -65,6 +177,10 @@ class AskUsAnything(Cog):
         self.aua_managers = []
         if aua_managers_raw:
             self.aua_managers = [int(x) for x in aua_managers_raw.split(",")]
+        self.reaction_index = ReactionIndex(self.aua_managers)
+        # discord link -> hash of the text and status last written to notion
+        self.written_hashes:dict[str, str] = {}
+        self.pending_edits:dict[int, asyncio.Task] = {}
         
 
     @Cog.listener()
@@ -84,7 +200,8 @@ class AskUsAnything(Cog):
         )
         filter = notion.NotionFilterBuilder().add_url_filter("Discord Link", notion.URLCondition.EQUALS, url).build()
         log.debug(f"Adding or Updating Notion entry for {url}")
-        notion.add_or_update_entry(self.db_id_aua, payload, filter)
+        await asyncio.to_thread(notion.add_or_update_entry, self.db_id_aua, payload, filter)
+        self.written_hashes[url] = entry_hash(message_text, status)
 
         # check entry
         # aua_entries:list[notion.Entry] = notion.get_all_entries(self.db_id_aua, filter=filter)
@@ -125,7 +242,8 @@ class AskUsAnything(Cog):
     @commands.has_role("Moderator")
     @option(name="limit", input_type=int)
     @option(name="starting_message_id", input_type=str)
-    async def grab_aua_posts(self, ctx:discord.commands.ApplicationContext, limit:int=100, starting_message_id:str|None=None):
+    @option(name="resume", input_type=bool, description="Dort weitermachen, wo die letzte Analyse aufgehört hat")
+    async def grab_aua_posts(self, ctx:discord.commands.ApplicationContext, limit:int=100, starting_message_id:str|None=None, resume:bool=False):
         if ctx.author.id not in self.aua_managers:
             await ctx.respond("Lass das mal lieber Cedric oder Robin machen :)", ephemeral=True)
             return
@@ -147,51 +265,125 @@ class AskUsAnything(Cog):
         if not isinstance(channel, discord.TextChannel):
             raise Exception(f"Not a text channel but {type(channel)}")
 
-        start_message = None
+        before = None
         if starting_message_id:
-            start_message = await channel.fetch_message(int(starting_message_id))
-
-        counter = 0
-        async for message in channel.history(limit=limit, before=start_message):
-            try:
-                author = message.author
-                counter += 1
-                current_message = f"Analysiere Nachricht {counter} von {limit}"
-                if author.bot:
-                    await initial_response.edit_original_response(content=f"{current_message}: Nachricht ist von einem Bot")
+            before = discord.Object(int(starting_message_id))
+        elif resume and env.AUA_BACKFILL_CHECKPOINT:
+            before = discord.Object(env.AUA_BACKFILL_CHECKPOINT)
+
+        progress = await self.backfill(channel, limit, before, initial_response)
+
+        log.debug(f"AUA backfill finished: {progress}")
+        await initial_response.edit_original_response(content=f"Fertig: {progress}")
+
+    async def backfill(self, channel:discord.TextChannel, limit:int, before:discord.abc.Snowflake|None, initial_response:discord.Interaction) -> BackfillProgress:
+        """
+        Reads the history page by page and analyses the reactions of a page concurrently,
+        while workers write the analysed messages to Notion from a bounded queue.
+        """
+        progress = BackfillProgress(limit)
+        queue:asyncio.Queue = asyncio.Queue(maxsize=BACKFILL_QUEUE_SIZE)
+        reaction_semaphore = asyncio.Semaphore(REACTION_CONCURRENCY)
+
+        async def analyse(message:discord.Message):
+            async with reaction_semaphore:
+                return await self.reaction_index.get_status(message)
+
+        async def read_history():
+            page:list[discord.Message] = []
+            async for message in channel.history(limit=limit, before=before):
+                page.append(message)
+                if len(page) == HISTORY_PAGE_SIZE:
+                    await queue_page(page)
+                    page = []
+            if page:
+                await queue_page(page)
+
+        async def queue_page(messages:list[discord.Message]):
+            members = [message for message in messages if not message.author.bot]
+            statuses = await asyncio.gather(*(analyse(message) for message in members), return_exceptions=True)
+            to_write = []
+            for message, status in zip(members, statuses):
+                if isinstance(status, Exception):
+                    # writing it without its status would reset the status in notion
+                    progress.failed += 1
+                    log.error(f"An error occured while trying to analyse reactions of {message.jump_url}: {status!r}")
                 else:
-                    message_url = message.jump_url
-                    message_text = message.clean_content
-                    message_created_at:datetime = message.created_at
-                    status = await analyse_reactions(message.reactions, self.aua_managers)
-
+                    to_write.append((message, status))
+            progress.analysed += len(messages)
+            progress.skipped += len(messages) - len(members)
+            page = progress.add_page(messages[-1].id, len(to_write))
+            for message, status in to_write:
+                await queue.put((page, message, status))
+
+        async def write():
+            while True:
+                page, message, status = await queue.get()
+                try:
                     await self.write_or_update_notion(
                         status=status,
-                        author=author,
-                        date=message_created_at,
-                        message_text=message_text,
-                        url=message_url,
-                        initial_response=initial_response,
-                        current_message=current_message
+                        author=message.author,
+                        date=message.created_at,
+                        message_text=message.clean_content,
+                        url=message.jump_url
                     )
-            except Exception as e:
-                log.error(f"An error occured while trying to Analyse message: {str(e)}\n{traceback.format_exc()}")
-
-        log.debug(f"Found {counter} messages")
-        if initial_response:
-            if isinstance(initial_response, discord.Interaction):
-                await initial_response.edit_original_response(content=f"{counter} Nachrichten wurden analysiert")
-            else:
-                log.debug(f"Can't edit_original_response of {initial_response}")
+                    progress.written += 1
+                except Exception as e:
+                    progress.failed += 1
+                    log.error(f"An error occured while trying to write message {message.jump_url}: {str(e)}\n{traceback.format_exc()}")
+                finally:
+                    progress.upsert_done(page)
+                    queue.task_done()
+
+        async def report_progress():
+            last_report = None
+            while True:
+                await asyncio.sleep(PROGRESS_INTERVAL)
+                report = str(progress)
+                if report != last_report:
+                    last_report = report
+                    try:
+                        await initial_response.edit_original_response(content=f"{report} ...")
+                    except discord.HTTPException as e:
+                        log.warning(f"Could not update backfill progress: {e}")
+
+        workers = [asyncio.create_task(write()) for _ in range(BACKFILL_WORKERS)]
+        reporter = asyncio.create_task(report_progress())
+        started = time.perf_counter()
+        try:
+            await read_history()
+            await queue.join()
+        finally:
+            for task in workers + [reporter]:
+                task.cancel()
+        log.debug(f"AUA backfill of {progress.analysed} messages took {time.perf_counter() - started:.1f} s")
+        return progress
 
     @Cog.listener()
     async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        if payload.channel_id != self.channel_id_aua:
+            return
+
+        # restart the wait on every edit, only the settled message is synced
+        pending = self.pending_edits.get(payload.message_id)
+        if pending:
+            pending.cancel()
+        self.pending_edits[payload.message_id] = asyncio.create_task(self.sync_edit(payload))
+
+    async def sync_edit(self, payload: discord.RawMessageUpdateEvent):
+        try:
+            await asyncio.sleep(EDIT_SETTLE_DELAY)
+        except asyncio.CancelledError:
+            return
+        # from here on a newer edit doesn't cancel this sync, it waits for its own turn
+        self.pending_edits.pop(payload.message_id, None)
+
         channel = self.bot.get_channel(payload.channel_id)
-        if not channel or channel.id != self.channel_id_aua or not isinstance(channel, discord.TextChannel):
+        if not channel or not isinstance(channel, discord.TextChannel):
             return
 
         try:
-            message = await channel.fetch_message(payload.message_id)
+            message = await self.message_from_edit(channel, payload)
         except Exception as e:
             log.error(f"Could not fetch edited message: {e}")
             return
@@ -201,16 +393,35 @@ class AskUsAnything(Cog):
 
         log.debug(f"Message edited in {channel.mention} ({channel.name})")
         message_text = message.clean_content
-        author = message.author
-        date = message.created_at
         url = message.jump_url
+        status = await self.reaction_index.get_status(message) or AuaStatus.NOT_STARTED
 
-        await self.write_or_update_notion(
-            message_text=message_text,
-            author=author,
-            date=date,
-            url=url
-        )
+        if self.written_hashes.get(url) == entry_hash(message_text, status):
+            log.debug(f"Notion entry for {url} is already up to date")
+            return
+
+        try:
+            await self.write_or_update_notion(
+                message_text=message_text,
+                author=message.author,
+                date=message.created_at,
+                url=url,
+                status=status
+            )
+        except Exception as e:
+            log.error(f"Could not sync edited message {url}: {e}\n{traceback.format_exc()}")
+
+    async def message_from_edit(self, channel:discord.TextChannel, payload: discord.RawMessageUpdateEvent) -> discord.Message:
+        """
+        The edited message from the message cache, which gateway events keep up to date including its reactions.
+        It is only fetched if the cache doesn't hold the edited version.
+        """
+        content = payload.data.get("content")
+        # cached_message is the copy from before this edit was applied, only good if the content didn't change
+        for message in (self.bot.get_message(payload.message_id), payload.cached_message):
+            if message and (content is None or message.content == content):
+                return message
+        return await channel.fetch_message(payload.message_id)
 
     @Cog.listener()
     async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
@@ -218,6 +429,11 @@ class AskUsAnything(Cog):
         if not channel or channel.id != self.channel_id_aua or not isinstance(channel, discord.TextChannel):
             return
 
+        self.reaction_index.forget(payload.message_id)
+        pending = self.pending_edits.pop(payload.message_id, None)
+        if pending:
+            pending.cancel()
+
         # We can't get author or content from deleted message, but we can use the message id and channel
         url = f"https://discord.com/channels/{payload.guild_id}/{payload.channel_id}/{payload.message_id}"
 
@@ -251,6 +467,9 @@ class AskUsAnything(Cog):
         else:
             log.debug(f"Received member message in a {type(message.channel)} channel -> {message.channel}")
 
+        # a new message has no reactions yet
+        self.reaction_index.mark_seeded(message.id)
+
         message_text = message.clean_content
         author = message.author
         date = message.created_at
@@ -274,17 +493,45 @@ class AskUsAnything(Cog):
         if str(payload.emoji) not in emoji_to_status:
             # ignore reaction
             return
-        
+
+        if not payload.user_id in self.aua_managers: # Only act on robins reactions
+            return
+
+        self.reaction_index.add(payload.message_id, str(payload.emoji), payload.user_id)
+        log.debug("Received reaction from aua_manager")
+        # the reaction just added sets the status
+        await self.update_status_from_reactions(payload, emoji_to_status[str(payload.emoji)])
+
+    @Cog.listener()
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
+        if payload.channel_id != self.channel_id_aua:
+            return
+
+        if str(payload.emoji) not in emoji_to_status:
+            return
+
+        if not payload.user_id in self.aua_managers:
+            return
+
+        self.reaction_index.remove(payload.message_id, str(payload.emoji), payload.user_id)
+        log.debug("Reaction of aua_manager removed")
+        await self.update_status_from_reactions(payload)
+
+    @Cog.listener()
+    async def on_raw_reaction_clear(self, payload: discord.RawReactionClearEvent):
+        if payload.channel_id == self.channel_id_aua:
+            self.reaction_index.clear(payload.message_id)
+
+    @Cog.listener()
+    async def on_raw_reaction_clear_emoji(self, payload: discord.RawReactionClearEmojiEvent):
+        if payload.channel_id == self.channel_id_aua:
+            self.reaction_index.clear(payload.message_id, str(payload.emoji))
+
+    async def update_status_from_reactions(self, payload: discord.RawReactionActionEvent, status:AuaStatus|None=None):
         if not payload.guild_id:
             raise Exception("Reaction payload does not have guild_id")
-        
-        if not payload.channel_id:
-            raise Exception("Reaction payload does not have channel_id")
-        
-        # if not payload.message_id:
-        #     raise Exception("Reaction payload does not have channel_id")
 
-        # Get the guild, channel, and message where the reaction was added
+        # Get the guild, channel, and message where the reaction was changed
         guild = self.bot.get_guild(payload.guild_id)
         if not guild:
             raise Exception("Guild not found")
@@ -292,37 +539,20 @@ class AskUsAnything(Cog):
         channel = guild.get_channel(payload.channel_id)
         if not isinstance(channel, discord.TextChannel):
             raise Exception("Channel is not a Text Channel")
-        
-        # Get the user who added the reaction
-        user = guild.get_member(payload.user_id)
-        if not user:
-            log.error(f"User with id {payload.user_id} not found")
-            return
-        
-        if user.bot: # Ignore bot reactions
-            return
-        
-        if not user.id in self.aua_managers: # Only act on robins reactions
-            return
-        
+
         message = await channel.fetch_message(payload.message_id)
 
-        log.debug(f"Received reaction from aua_manager")
-        
         log.debug("Will act on reaction...")
 
-        url = message.jump_url
-        status = emoji_to_status[str(payload.emoji)]
-
-        message_text = message.clean_content
-        author = message.author
-        date = message.created_at
+        if status is None:
+            # after a removal the remaining reactions decide, only enumerates them if the message is new to the index
+            status = await self.reaction_index.get_status(message)
 
         await self.write_or_update_notion(
-            message_text=message_text,
-            author=author,
-            date=date,
-            url=url,
+            message_text=message.clean_content,
+            author=message.author,
+            date=message.created_at,
+            url=message.jump_url,
             status=status)
 
 def setup(bot:Bot):
@@ -0,0 +1,93 @@
+from discord.ext import tasks
+from discord import Bot
+from ezcord import log, Cog
+from aiohttp import web
+from datetime import datetime
+import asyncio
+import modules.notion as notion
+from modules import env, ics
+import modules.paper_events_common as pe_common
+from modules.spelltable.tournament_model import active_tournaments
+
+CALENDAR_FEED_HOST = env.CALENDAR_FEED_HOST
+CALENDAR_FEED_PORT = env.CALENDAR_FEED_PORT
+CALENDAR_FEED_PATH = "/calendar.ics"
+
+def get_upcoming_paper_events() -> list[notion.Entry]:
+    filter = (
+        notion.NotionFilterBuilder()
+        .add_date_filter("Start (und Ende)", notion.DateCondition.ON_OR_AFTER, datetime.now())
+        .add_checkbox_filter("For Test", notion.CheckboxCondition.EQUALS, env.DEBUG)
+        .build()
+    )
+    return notion.get_all_entries(env.EVENT_DATABASE_ID, filter=filter)
+
+class CalendarFeed(Cog):
+    """
+    Serves all upcoming paper events and Spelltable tournaments as one subscribable calendar.
+    """
+    def __init__(self, bot:Bot):
+        self.bot = bot
+        self.runner:web.AppRunner|None = None
+
+    @Cog.listener()
+    async def on_ready(self):
+        if not self.refresh.is_running():
+            self.refresh.start()
+        if CALENDAR_FEED_PORT and not self.runner:
+            app = web.Application()
+            app.router.add_get(CALENDAR_FEED_PATH, self.handle_calendar)
+            self.runner = web.AppRunner(app)
+            await self.runner.setup()
+            await web.TCPSite(self.runner, CALENDAR_FEED_HOST, CALENDAR_FEED_PORT).start()
+            log.info(f"Calendar feed served on http://{CALENDAR_FEED_HOST}:{CALENDAR_FEED_PORT}{CALENDAR_FEED_PATH}")
+        log.debug(self.__class__.__name__ + " is ready")
+
+    def cog_unload(self):
+        self.refresh.cancel()
+        if self.runner:
+            asyncio.create_task(self.runner.cleanup())
+            self.runner = None
+
+    async def handle_calendar(self, request:web.Request) -> web.Response:
+        feed = ics.calendar_feed
+        content = feed.to_bytes()
+        etag = f'"{feed.etag}"'
+        headers = {"ETag": etag, "Cache-Control": "max-age=300"}
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=content, content_type="text/calendar", charset="utf-8", headers=headers)
+
+    @tasks.loop(hours=1)
+    async def refresh(self):
+        """
+        Picks up events that were changed outside of the bot and drops the ones that have passed.
+        Unchanged events keep their rendered form.
+        """
+        entries = await asyncio.to_thread(get_upcoming_paper_events)
+        paper_uids = set()
+        for entry in entries:
+            thread_id = entry.get_text_property("Thread ID")
+            server_id = entry.get_text_property("Server ID")
+            date = entry.get_date_property("Start (und Ende)")
+            if not thread_id or not date:
+                continue
+            uid = pe_common.calendar_uid(int(thread_id))
+            paper_uids.add(uid)
+            location = ", ".join(part for part in (entry.get_text_property("Name des Ladens"), entry.get_text_property("Stadt")) if part)
+            ics.calendar_feed.set_event(
+                uid,
+                entry.get_text_property("Event Titel"),
+                date['start'],
+                date['end'],
+                description=entry.get_text_property("Freitext"),
+                location=location or None,
+                url=f"https://discord.com/channels/{server_id}/{thread_id}"
+            )
+        ics.calendar_feed.remove_missing(pe_common.CALENDAR_UID_PREFIX, paper_uids)
+
+        for tournament in list(active_tournaments.values()):
+            tournament.update_calendar_feed()
+
+def setup(bot:Bot):
+    bot.add_cog(CalendarFeed(bot))
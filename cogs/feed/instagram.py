@@ -1,10 +1,13 @@
 from modules import instagram
-from discord.ext import commands, tasks
+from discord.ext import commands
 import os
+import asyncio
 import discord
 from discord import Bot
 from ezcord import log
 from modules import env
+from modules.feed import FeedSource, feed_scheduler
+from datetime import timedelta
 import json
 
 MOCK = True  # Set to True to use mock data from ig_return.json
@@ -13,7 +16,27 @@ class InstagramProfile():
     def __init__(self, name:str, dc_user_id:int):
         self.name = name
         self.dc_user_id = dc_user_id
-        self.content_cache = []
+
+def load_mock_posts() -> list[dict]:
+    with open("ig_return.json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+class InstagramSource(FeedSource):
+    def __init__(self, cog:"InstagramMonitor", ig_channel:InstagramProfile):
+        # every poll is a paid actor run
+        super().__init__(f"instagram_{ig_channel.name}", timedelta(hours=12), timedelta(hours=6), timedelta(hours=24))
+        self.cog = cog
+        self.ig_channel = ig_channel
+
+    async def fetch(self):
+        if MOCK:
+            posts = await asyncio.to_thread(load_mock_posts)
+        else:
+            posts = await instagram.get_latest_instagram_posts(self.ig_channel.name, max_posts=5, apify_token=os.getenv("API_KEY_INSTAGRAM"))
+        return [(post['id'], post) for post in posts]
+
+    async def post(self, post):
+        await self.cog.post_content(self.ig_channel, post)
 
 class InstagramMonitor(commands.Cog):
     def __init__(self, bot:Bot):
@@ -21,6 +44,7 @@ class InstagramMonitor(commands.Cog):
         self.channels = [
             InstagramProfile("gamerii93", 270288996666441728)
         ]
+        self.sources = [InstagramSource(self, ig_channel) for ig_channel in self.channels]
 
         channel_id_str = os.getenv("CHANNEL_INSTAGRAM")
         if channel_id_str is not None:
@@ -49,7 +73,7 @@ class InstagramMonitor(commands.Cog):
             else:
                 post_id = post
 
-            post_data = instagram.get_post_by_id(post_id, apify_token=os.getenv("API_KEY_INSTAGRAM"))
+            post_data = await instagram.get_post_by_id(post_id, apify_token=os.getenv("API_KEY_INSTAGRAM"))
             if not post_data:
                 await ctx.respond("Kein Beitrag gefunden für diese ID/URL.", ephemeral=True)
                 return
@@ -72,8 +96,12 @@ class InstagramMonitor(commands.Cog):
 
         log.debug(self.__class__.__name__ + " is ready")
 
-        if not self.check_channels.is_running():
-            self.check_channels.start()
+        for source in self.sources:
+            feed_scheduler.start(source)
+
+    def cog_unload(self):
+        for source in self.sources:
+            feed_scheduler.stop(source)
 
     async def post_content(self, ig_channel:InstagramProfile, new_post):
         caption = new_post.get("caption")
@@ -102,33 +130,6 @@ class InstagramMonitor(commands.Cog):
             display_url = display_url.replace("https://instagram.fosu2-1.fna.fbcdn.net", "https://scontent-dus1-1.cdninstagram.com")
             await self.discord_channel.send(content=f"{header}\n{display_url}")
 
-    async def get_latest_posts(self, channel:InstagramProfile):
-        latest_posts = None
-        if MOCK:
-            with open("ig_return.json", "r", encoding="utf-8") as f:
-                posts = json.load(f)
-            latest_posts = [post for post in posts if post not in channel.content_cache]
-        else:
-            posts = instagram.get_latest_instagram_posts(channel.name, max_posts=5, apify_token=os.getenv("API_KEY_INSTAGRAM"))
-            latest_posts = [post for post in posts if post not in channel.content_cache]
-        return latest_posts
-
-    @tasks.loop(hours=12)
-    async def check_channels(self):
-        for ig_channel in self.channels:
-            latest_posts = await self.get_latest_posts(ig_channel)
-            if self.check_channels.current_loop == 0:
-                log.info("Initializing content cache for Instagram channel")
-                ig_channel.content_cache.extend(post['id'] for post in latest_posts)
-                continue
-            for post in latest_posts:
-                if post['id'] in ig_channel.content_cache:
-                    pass
-                    # log.debug(f"Post already in cache: {post.get('id')}")
-                else:
-                    await self.post_content(ig_channel, post)
-                    ig_channel.content_cache.append(post['id'])
-
 def setup(bot:Bot):
     bot.add_cog(InstagramMonitor(bot))
     
\ No newline at end of file
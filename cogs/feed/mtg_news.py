@@ -1,9 +1,12 @@
 from ezcord import log, Cog
 from modules.util import check_website
 from discord import Bot
-import discord.ext.tasks
+import discord
+import asyncio
 import logging
+from datetime import timedelta
 from modules import env
+from modules.feed import FeedSource, feed_scheduler
 import re
 
 link_log = logging.getLogger("link_logger")
@@ -43,51 +46,50 @@ def html_to_discord(text):
     text = re.sub(r'<[^>]+>', '', text)
     return text
 
+class MtgNewsSource(FeedSource):
+    def __init__(self, bot:Bot, lang:str, obj:dict):
+        super().__init__(f"mtg_news_{lang}", timedelta(minutes=10), timedelta(minutes=5), timedelta(hours=1))
+        self.bot = bot
+        self.lang = lang
+        self.obj = obj
+
+    async def fetch(self):
+        latest_articles = await asyncio.to_thread(check_website.request_website, self.obj["url"], "article", SELECTORS)
+        if latest_articles is None:
+            raise Exception(f"Failed to fetch latest articles from Magic News {self.lang.upper()}")
+        return [(f'{URL_WIZARDS}{article["url"]}', article) for article in latest_articles]
+
+    async def post(self, article):
+        lang = self.lang
+        article_url = f'{URL_WIZARDS}{article["url"]}'
+        authors = ', '.join(
+            f'[{author["name"]}](<{URL_WIZARDS}{author["link"]}>)'
+            for author in article['authors']
+        )
+
+        channel:discord.TextChannel = await discord.utils.get_or_fetch(self.bot, "channel", self.obj["channel_id"])
+        await channel.send(f"""
+# {article["title"]}
+{"von" if lang == "de" else "by"} {authors}
+{self.obj["role_ping"]}
+{article_url}
+{"Weitere" if lang == "de" else "More"} [{article["type"]} {"Artikel" if lang == "de" else "articles"}](<{article_url}>)""")
+
 class MtgNews(Cog):
     def __init__(self, bot:Bot):
         self.bot = bot
-        self.posted_articles = []
+        self.sources = [MtgNewsSource(bot, lang, obj) for lang, obj in NEWS_URLS.items()]
 
     @Cog.listener()
     async def on_ready(self):
-        if not self.check_mtg_news.is_running():
-            self.check_mtg_news.start()
+        for source in self.sources:
+            feed_scheduler.start(source)
             
         log.debug(self.__class__.__name__ + " is ready")
 
-    @discord.ext.tasks.loop(minutes=10)
-    async def check_mtg_news(self):
-        for lang, obj in NEWS_URLS.items():
-            latest_articles = check_website.request_website(obj["url"], "article", SELECTORS)
-            channel:discord.TextChannel = await discord.utils.get_or_fetch(self.bot, "channel", obj["channel_id"])
-            if latest_articles is None:
-                log.error("Failed to fetch latest articles from Magic News DE")
-                return
-
-            # On first run, just save all articles and skip posting
-            if self.check_mtg_news.current_loop == 0:
-                self.posted_articles.extend(
-                    f'{URL_WIZARDS}{article["url"]}' for article in latest_articles
-                )
-                continue
-
-            for article in latest_articles:
-                article_url = f'{URL_WIZARDS}{article["url"]}'
-                if article_url in self.posted_articles:
-                    continue  # Already posted
-
-                authors = ', '.join(
-                    f'[{author["name"]}](<{URL_WIZARDS}{author["link"]}>)'
-                    for author in article['authors']
-                )
-
-                await channel.send(f"""
-# {article["title"]}
-{"von" if lang == "de" else "by"} {authors}
-{obj["role_ping"]}
-{article_url}
-{"Weitere" if lang == "de" else "More"} [{article["type"]} {"Artikel" if lang == "de" else "articles"}](<{article_url}>)""")
-                self.posted_articles.append(article_url)
+    def cog_unload(self):
+        for source in self.sources:
+            feed_scheduler.stop(source)
 
 def setup(bot:Bot):
     bot.add_cog(MtgNews(bot))
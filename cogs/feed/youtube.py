@@ -1,10 +1,14 @@
-from discord.ext import commands, tasks
+from discord.ext import commands
 import os
+import asyncio
+import aiohttp
 import discord
 from discord import Bot
-import scrapetube
 from ezcord import log
 from enum import Enum
+from datetime import timedelta
+from modules import youtube
+from modules.feed import FeedSource, feed_scheduler
 
 class ContentType(Enum):
     VIDEOS = "videos"
@@ -12,12 +16,45 @@ class ContentType(Enum):
     STREAMS = "streams"
 
 class YoutubeChannel():
-    def __init__(self, name:str, dc_user_id:int):
+    def __init__(self, name:str, dc_user_id:int, channel_id:str|None=None):
         self.name = name
         self.dc_user_id = dc_user_id
-        self.content = {}
-        for content_type in ContentType:
-            self.content[content_type] = None
+        # without a channel id it is looked up once from the handle
+        self.feed = youtube.ChannelFeed(f"@{name}", channel_id)
+
+class YoutubeSource(FeedSource):
+    def __init__(self, cog:"Youtube", yt_channel:YoutubeChannel):
+        super().__init__(f"youtube_{yt_channel.name}", timedelta(minutes=5), timedelta(minutes=2), timedelta(minutes=30))
+        self.cog = cog
+        self.yt_channel = yt_channel
+
+    async def fetch(self):
+        async with youtube.create_session() as session:
+            entries = await self.yt_channel.feed.fetch(session)
+            # shorts aren't announced
+            entries = [entry for entry in entries if "/shorts/" not in (entry["url"] or "")]
+            # only new entries cost an api call to tell streams from videos
+            new_ids = [entry["videoId"] for entry in entries if entry["videoId"] not in self.seen]
+            live_details = {}
+            if new_ids and self.initialized:
+                try:
+                    live_details = await youtube.get_live_streaming_details(session, new_ids)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    # the classification is optional, rather announce a stream as video than not at all
+                    log.warning(f"Could not tell streams from videos for {self.yt_channel.name}: {e}")
+
+        contents = []
+        for entry in entries:
+            details = live_details.get(entry["videoId"])
+            # a finished stream is announced like a video
+            content_type = ContentType.STREAMS if details and "actualEndTime" not in details else ContentType.VIDEOS
+            contents.append((entry["videoId"], {**entry, "content_type": content_type}))
+        return contents
+
+    async def post(self, content):
+        content_type = content["content_type"]
+        log.info(f"going to post https://www.youtube.com/watch?v={content['videoId']} as {content_type}")
+        await self.cog.post_video(self.yt_channel, content_type, content)
 
 class Youtube(commands.Cog):
     def __init__(self, bot:Bot):
@@ -25,6 +62,7 @@ class Youtube(commands.Cog):
         self.channels = [
             YoutubeChannel("GameRii", 270288996666441728)
         ]
+        self.sources = [YoutubeSource(self, yt_channel) for yt_channel in self.channels]
 
         channel_id_str = os.getenv("CHANNEL_YOUTUBE")
         if channel_id_str is not None:
@@ -42,8 +80,8 @@ class Youtube(commands.Cog):
             raise Exception("discord_channel is not a discord.TextChannel")
         self.discord_channel:discord.TextChannel = discord_channel
 
-        if not self.check_channels.is_running():
-            self.check_channels.start()
+        for source in self.sources:
+            feed_scheduler.start(source)
 
         log.debug(self.__class__.__name__ + " is ready")
 
@@ -54,37 +92,9 @@ class Youtube(commands.Cog):
         else:
             await self.discord_channel.send(f"<@&{os.getenv('ROLE_ANNOUNCEMENT')}>\nneues Video von **<@{yt_channel.dc_user_id}>**\n\n{url}")
 
-    async def get_latest_content(self, channel:YoutubeChannel, content_type:ContentType):
-        limit = 10
-        generator = scrapetube.get_channel(
-            channel_username=channel.name,
-            limit=10,
-            content_type=content_type.value,
-            sort_by='newest')
-        skipped = []
-        for content in generator:
-            if 'badges' in content:
-                skipped.append(content)
-                continue
-            return content
-        log.warning(f"No 'non-badge' {content_type} in the last {limit} videos")
-        return None
-
-    @tasks.loop(minutes=5)
-    async def check_channels(self):
-        for yt_channel in self.channels:
-            for content_type, content_cache in yt_channel.content.items():
-                latest_content = await self.get_latest_content(yt_channel, content_type)
-                if not latest_content:
-                    continue
-                # log.debug(f"https://www.youtube.com/watch?v={latest_content['videoId']} is the latest {content_type}")
-                if content_cache and not content_cache['videoId'] == latest_content['videoId']:
-                    log.info(f"going to post https://www.youtube.com/watch?v={latest_content['videoId']} as {content_type}")
-                    await self.post_video(yt_channel, content_type, latest_content)
-                else:
-                    pass
-                    # log.debug("it has been posted already")
-                yt_channel.content[content_type] = latest_content
+    def cog_unload(self):
+        for source in self.sources:
+            feed_scheduler.stop(source)
 
 def setup(bot:Bot):
     bot.add_cog(Youtube(bot))
@@ -82,7 +82,6 @@ class FieldSelect(discord.ui.Select):
             if gmaps_embed:
                 embeds.append(gmaps_embed)
             
-            view.event.construct_gmaps_embed()
             await parsing_message.edit(
                 content=view.event.construct_content(preview=True),
                 embeds=embeds,
@@ -1,3 +1,4 @@
+import asyncio
 from ezcord import Cog, log
 import discord
 from discord.ext.commands import slash_command
@@ -18,35 +19,44 @@ class PaperEventsRequest(Cog):
     async def on_ready(self):
         log.debug(self.__class__.__name__ + " is ready")
         
-    def get_paper_events(self, plz, land):
+    def get_paper_events(self, plz, land, max_events=gmaps.DISTANCE_MATRIX_MAX_DESTINATIONS):
         filter = (
             notion.NotionFilterBuilder()
             .add_checkbox_filter("For Test", notion.CheckboxCondition.EQUALS, False)
             .add_number_filter("in ~ Tagen", notion.NumberCondition.GREATER_THAN, 0)
             .build())
 
-        events = {}
+        events_by_address:dict[str, list[dict]] = {}
 
         all_entries = notion.get_all_entries(DB_PAPER_EVENTS_ID, filter=filter)
-        destinations = []
         for entry in all_entries:
             address = entry.get_formula_property("Google Maps")
-            events[entry.id] = {
+            event = {
                 "address": address,
                 "entry": entry
             }
-            destinations.append(address)
+            events_by_address.setdefault(address, []).append(event)
 
-        results = gmaps.get_distances(f"{plz} {land if land else ''}", destinations)
+        origin = f"{plz} {land if land else ''}"
+        origin_coord = gmaps.get_coordinates(origin)
+        if not origin_coord:
+            raise Exception(f"Konnte {origin} nicht finden")
+
+        # Only ask the routing API for the events that are closest as the crow flies
+        destinations = gmaps.nearest_by_air(origin_coord, list(events_by_address), max_events)
+        results = gmaps.get_distances(origin, destinations)
 
         # Attach distance and duration values to the events
+        nearby_events = {}
         for address, data in results.items():
-            for event_id, event in events.items():
-                if event["address"] == address:
-                    event["distance"] = data["distance"]
-                    event["duration"] = data["duration"]
-
-        return events
+            if data.get("status") != "OK":
+                continue
+            for event in events_by_address[address]:
+                event["distance"] = data["distance"]
+                event["duration"] = data["duration"]
+                nearby_events[event["entry"].id] = event
+
+        return nearby_events
     
     def events_to_ascii_table(self, events):
         # Define the table headers
@@ -117,7 +127,8 @@ class PaperEventsRequest(Cog):
         try:
             dm_channel = await ctx.user.create_dm()
             
-            paper_events = self.get_paper_events(plz, land)
+            # notion and google maps are blocking, keep them off the event loop
+            paper_events = await asyncio.to_thread(self.get_paper_events, plz, land)
 
             # Sort paper_events by distance
             sorted_paper_events = sorted(paper_events.items(), key=lambda item: item[1]['distance']['value'])
@@ -134,7 +145,7 @@ class PaperEventsRequest(Cog):
             batch_size = 10
             for i in range(0, len(embeds), batch_size):
                 batch = embeds[i:i + batch_size]
-                last_message = await dm_channel.send("Hier sind alle kommenden Events nach Entfernung sortiert:", embeds=batch)
+                last_message = await dm_channel.send("Hier sind die nächstgelegenen kommenden Events nach Entfernung sortiert:", embeds=batch)
 
             await initial_response_casted.edit_original_response(content=f"Ich habe dir die Veranstaltungen per Privatnachricht geschickt. {last_message.jump_url}")
         except Exception as e:
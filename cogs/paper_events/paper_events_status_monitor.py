@@ -4,7 +4,10 @@ from ezcord import Cog
 from discord import Bot
 from ezcord import log
 import modules.notion as notion
+from modules import env
 from datetime import datetime, timedelta
+import asyncio
+import heapq
 import os
 import logging
 
@@ -20,14 +23,27 @@ if GUILD:
 else:
     raise Exception(".env/GUILD not defined")
 
-CHANNEL_PAPER_EVENTS_ID = os.getenv("CHANNEL_PAPER_EVENTS")
+CHANNEL_PAPER_EVENTS_ID = env.CHANNEL_PAPER_EVENTS_ID
 DEBUG = get_bool_from_env("DEBUG")
 DB_PAPER_EVENTS_ID = "f05d532cf91f4f9cbce38e27dc85b522"
+DELETE_AFTER = timedelta(days=30)
+
+def localize(date:datetime) -> datetime:
+    # date only entries from Notion come without timezone
+    if date.tzinfo is None:
+        return env.TIMEZONE.localize(date)
+    return date
 
 class PaperEventsStatusMonitor(Cog):
 
     def __init__(self, bot:Bot):
         self.bot = bot
+        self.guild = None
+        # heap of (due, thread_id, event_end), a thread gets archived at event_end and deleted DELETE_AFTER later
+        self.transitions:list[tuple[datetime, int, datetime]] = []
+        self.threads:dict[int, discord.Thread] = {}
+        self.schedule_changed = asyncio.Event()
+        self.transition_task:asyncio.Task|None = None
 
     @Cog.listener()
     async def on_ready(self):
@@ -35,11 +51,79 @@ class PaperEventsStatusMonitor(Cog):
         if self.guild:
             if not self.check.is_running():
                 self.check.start()
+            if not self.transition_task or self.transition_task.done():
+                self.transition_task = asyncio.create_task(self.run_transitions())
         else:
             log.error("Guild not found")
         log.debug(self.__class__.__name__ + " is ready")
 
-    @tasks.loop(minutes=15)
+    def cog_unload(self):
+        self.check.cancel()
+        if self.transition_task:
+            self.transition_task.cancel()
+
+    async def get_threads(self) -> dict[int, discord.Thread]:
+        """
+        Active threads come from the gateway cache, archived ones from one listing of the forum channel.
+        """
+        threads = {thread.id: thread for thread in self.guild.threads}
+        forum_channel = self.guild.get_channel(CHANNEL_PAPER_EVENTS_ID)
+        if isinstance(forum_channel, discord.ForumChannel):
+            async for thread in forum_channel.archived_threads(limit=None):
+                threads[thread.id] = thread
+        else:
+            log.error(f"Channel {CHANNEL_PAPER_EVENTS_ID} is not a forum channel")
+        return threads
+
+    async def apply_state(self, thread:discord.Thread, event_end:datetime, now:datetime):
+        # geschlossen = archived
+        # sperren = locked
+        is_archived = thread.archived
+        is_passed = event_end < now
+        is_way_passed = event_end < now - DELETE_AFTER
+
+        if is_way_passed:
+            await thread.delete()
+            self.threads.pop(thread.id, None)
+            log.info(f"Deleted Event {thread.name}. It was over a month passed.")
+        else:
+            if (is_passed and not is_archived) or (not is_passed and is_archived):
+                try:
+                    await thread.edit(archived=is_passed)
+                    log.info(f"{thread.name} - changed thread archive state to: {is_passed}")
+                except discord.Forbidden:
+                    log.info(f"Missing permissions to edit thread: {thread.name}")
+                except discord.HTTPException as e:
+                    log.info(f"Failed to edit thread {thread.name}: {e}")
+
+    async def run_transitions(self):
+        """
+        Sleeps until the next scheduled transition is due or the schedule changes.
+        """
+        while True:
+            self.schedule_changed.clear()
+            timeout = None
+            if self.transitions:
+                timeout = max(0, (self.transitions[0][0] - datetime.now(tz=env.TIMEZONE)).total_seconds())
+            try:
+                await asyncio.wait_for(self.schedule_changed.wait(), timeout=timeout)
+                continue
+            except asyncio.TimeoutError:
+                pass
+
+            now = datetime.now(tz=env.TIMEZONE)
+            while self.transitions and self.transitions[0][0] <= now:
+                due, thread_id, event_end = heapq.heappop(self.transitions)
+                thread = self.guild.get_thread(thread_id) or self.threads.get(thread_id)
+                if not thread:
+                    continue
+                try:
+                    await self.apply_state(thread, event_end, now)
+                except discord.NotFound:
+                    # Event Post already deleted
+                    self.threads.pop(thread_id, None)
+
+    @tasks.loop(hours=1)
     async def check(self):
         if self.guild == None:
             return
@@ -56,49 +140,39 @@ class PaperEventsStatusMonitor(Cog):
             database_id=DB_PAPER_EVENTS_ID,
             filter = filter
         )
+        self.threads = await self.get_threads()
+        now = datetime.now(tz=env.TIMEZONE)
+        transitions = []
         for entry in entries:
             date = entry.get_date_property('Start (und Ende)')
             event_start:datetime = date['start']
             event_end:datetime = date['end']
             event_discord_channel_id = entry.get_text_property("Thread ID")
             event_title = entry.get_text_property("Event Titel")
-            now = datetime.now(tz=event_start.tzinfo)
             if not event_discord_channel_id:
                 log.error(f"Event {event_title} has no Channel ID")
                 continue
             thread_id = int(event_discord_channel_id)
-            try:
-                thread = await self.guild.fetch_channel(thread_id)
-            except discord.errors.NotFound:
+            thread = self.threads.get(thread_id)
+            if not thread:
                 # Event Post already deleted
-                # log.debug(f"Thread not found: {thread_id}")
                 continue
-            if not isinstance(thread, discord.Thread):
-                log.error(f"Not a Thread")
+
+            date_to_compare = localize(event_end or event_start)
+
+            try:
+                await self.apply_state(thread, date_to_compare, now)
+            except discord.NotFound:
                 continue
 
-            date_to_compare = event_start
-            if event_end:
-                date_to_compare = event_end
-
-            # geschlossen = archived
-            # sperren = locked
-            is_archived = thread.archived
-            is_passed = date_to_compare < now
-            is_way_passed = date_to_compare < now - timedelta(days=30)
-
-            if is_way_passed:
-                await thread.delete()
-                log.info(f"Deleted Event {thread.name}. It was over a month passed.")
-            else:
-                if (is_passed and not is_archived) or (not is_passed and is_archived):
-                    try:
-                        await thread.edit(archived=is_passed)
-                        log.info(f"{thread.name} - changed thread archive state to: {is_passed}")
-                    except discord.Forbidden:
-                        log.info(f"Missing permissions to edit thread: {thread.name}")
-                    except discord.HTTPException as e:
-                        log.info(f"Failed to edit thread {thread.name}: {e}")
+            if date_to_compare > now:
+                transitions.append((date_to_compare, thread_id, date_to_compare))
+            if date_to_compare + DELETE_AFTER > now:
+                transitions.append((date_to_compare + DELETE_AFTER, thread_id, date_to_compare))
+
+        heapq.heapify(transitions)
+        self.transitions = transitions
+        self.schedule_changed.set()
 
 def setup(bot:Bot):
     bot.add_cog(PaperEventsStatusMonitor(bot))
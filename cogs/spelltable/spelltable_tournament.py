@@ -6,6 +6,7 @@ from modules import date_time_interpretation
 import os, re
 from modules import swiss_mtg
 from modules import env
+from modules.member_resolver import member_resolver
 import logging
 
 from discord.ext import tasks
@@ -319,8 +320,11 @@ class SpelltableTournamentManager(Cog):
                         
                         if message.channel.archived:
                             await message.channel.edit(archived=False)
-                        pairings = await tournament.get_pairings()
-                        await message.edit(view=view, content=f"Paarungen für die {current_round.round_number}. Runde:\n\n{pairings}")
+                        pairings_content = await tournament.pairings_content(current_round)
+                        if pairings_content == message.content:
+                            await message.edit(view=view)
+                        else:
+                            await message.edit(view=view, content=pairings_content)
                 else:
                     view = await ParticipationView.create(tournament)
                     await tournament_message.edit(view=view)
@@ -336,6 +340,18 @@ class SpelltableTournamentManager(Cog):
 
         log.debug(self.__class__.__name__ + " is ready")
 
+    @Cog.listener()
+    async def on_member_join(self, member:discord.Member):
+        member_resolver.update(member)
+
+    @Cog.listener()
+    async def on_member_update(self, before:discord.Member, after:discord.Member):
+        member_resolver.update(after)
+
+    @Cog.listener()
+    async def on_member_remove(self, member:discord.Member):
+        member_resolver.remove(member.guild.id, member.id)
+
     # @has_role("Moderator")
     @slash_command(description="Erstelle ein Spelltable Turnier für den Server")
     async def erstelle_turnier(
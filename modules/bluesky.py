@@ -20,6 +20,12 @@ def get_target_did(user_handle):
     target_did = target_user.did
     return target_did
 
+def get_latest_posts(target_did, limit:int=10):
+    if not client.me:
+        init()
+    timeline = client.app.bsky.feed.get_author_feed({'actor': target_did, 'limit': limit})
+    return [item.post for item in timeline.feed]
+
 def check_for_new_post(target_did):
     if not client.me:
         init()
@@ -50,6 +50,7 @@ GUILD_ID = get_int_from_env("GUILD")
 EVENT_DATABASE_ID:str = os.getenv("EVENT_DATABASE_ID")
 AREA_DATABASE_ID = os.getenv("AREA_DATABASE_ID")
 AUA_DATABASE_ID = os.getenv("DATABASE_ID_AUA")
+AUA_BACKFILL_CHECKPOINT = get_int_from_env("AUA_BACKFILL_CHECKPOINT", config)
 CHANNEL_PAPER_EVENTS_ID = get_int_from_env("CHANNEL_PAPER_EVENTS")
 GMAPS_TOKEN = os.getenv("GMAPS_TOKEN")
 
@@ -60,4 +61,6 @@ LOG_WEBHOOK = os.getenv("LOG_WEBHOOK")
 API_KEY_IMGBB = os.getenv("API_KEY_IMGBB")
 CHANNEL_NEWS_DE = get_int_from_env("CHANNEL_NEWS_DE")
 CHANNEL_NEWS_EN = get_int_from_env("CHANNEL_NEWS_EN")
-API_KEY_YOUTUBE = os.getenv("API_KEY_YOUTUBE")
\ No newline at end of file
+API_KEY_YOUTUBE = os.getenv("API_KEY_YOUTUBE")
+CALENDAR_FEED_HOST = os.getenv("CALENDAR_FEED_HOST", "0.0.0.0")
+CALENDAR_FEED_PORT = get_int_from_env("CALENDAR_FEED_PORT")
@@ -0,0 +1,114 @@
+from datetime import timedelta
+import asyncio
+import time
+import traceback
+from ezcord import log
+from modules.util import cache
+
+MAX_SEEN = 500 # ids remembered per source, far more than any feed returns at once
+SPEEDUP = 0.5 # interval factor after a poll found something new
+SLOWDOWN = 1.5 # interval factor after a poll without anything new
+
+class FeedSource:
+    """
+    A polled feed. Subclasses implement fetch and post, the source remembers what it has posted across restarts
+    and adapts its polling interval: faster after new items, slower while nothing happens, exponential backoff on errors.
+    """
+    def __init__(self, name:str, interval:timedelta, min_interval:timedelta|None=None, max_interval:timedelta|None=None):
+        self.name = name
+        self.default_interval = interval.total_seconds()
+        self.min_interval = (min_interval or interval).total_seconds()
+        self.max_interval = (max_interval or interval).total_seconds()
+        self.state_file = cache.cache_path("feeds", f"{name}.json")
+
+        state = cache.load_json(self.state_file)
+        # without saved state the first poll only learns what's already there, like the old loops did
+        self.initialized = state is not None
+        state = state or {}
+        self.seen:dict[str, None] = dict.fromkeys(state.get("seen", []))
+        self.interval = min(max(state.get("interval", self.default_interval), self.min_interval), self.max_interval)
+        self.failures = 0
+        self.next_poll = time.monotonic()
+
+    async def fetch(self) -> list[tuple[str, object]]:
+        """
+        Returns (id, item) of the latest items, newest first.
+        """
+        raise NotImplementedError
+
+    async def post(self, item):
+        raise NotImplementedError
+
+    def save_state(self):
+        cache.save_json(self.state_file, {"seen": list(self.seen)[-MAX_SEEN:], "interval": self.interval})
+
+    def mark_seen(self, item_id:str):
+        self.seen[item_id] = None
+        if len(self.seen) > MAX_SEEN:
+            del self.seen[next(iter(self.seen))]
+
+    async def poll(self):
+        try:
+            items = await self.fetch()
+        except Exception as e:
+            self.failures += 1
+            delay = min(self.interval * 2 ** self.failures, self.max_interval)
+            log.error(f"Feed {self.name} failed {self.failures} time(s) in a row, retrying in {delay:.0f} s: {e}\n{traceback.format_exc()}")
+            self.next_poll = time.monotonic() + delay
+            return
+        self.failures = 0
+
+        new_items = [(item_id, item) for item_id, item in items if item_id not in self.seen]
+        if not self.initialized:
+            log.info(f"Initializing feed {self.name} with {len(new_items)} items")
+            for item_id, _ in reversed(new_items):
+                self.mark_seen(item_id)
+            self.initialized = True
+            new_items = []
+
+        # oldest first, so the channel reads in order
+        for item_id, item in reversed(new_items):
+            try:
+                await self.post(item)
+            except Exception as e:
+                log.error(f"Feed {self.name} could not post {item_id}: {e}\n{traceback.format_exc()}")
+            # never post an item twice, even if posting failed halfway
+            self.mark_seen(item_id)
+            self.save_state()
+
+        if new_items:
+            self.interval = max(self.interval * SPEEDUP, self.min_interval)
+        else:
+            self.interval = min(self.interval * SLOWDOWN, self.max_interval)
+        self.save_state()
+        self.next_poll = time.monotonic() + self.interval
+
+class FeedScheduler:
+    """
+    Polls every started source in its own task, so a slow source never holds up the others.
+    """
+    def __init__(self):
+        self.tasks:dict[str, asyncio.Task] = {}
+
+    def start(self, source:FeedSource):
+        task = self.tasks.get(source.name)
+        if task and not task.done():
+            return
+        self.tasks[source.name] = asyncio.create_task(self.run(source))
+
+    def stop(self, source:FeedSource):
+        task = self.tasks.pop(source.name, None)
+        if task:
+            task.cancel()
+
+    async def run(self, source:FeedSource):
+        while True:
+            await asyncio.sleep(max(0, source.next_poll - time.monotonic()))
+            try:
+                await source.poll()
+            except Exception as e:
+                # e.g. the state file could not be written, keep polling anyway
+                log.error(f"Feed {source.name} poll crashed, retrying in {source.interval:.0f} s: {e}\n{traceback.format_exc()}")
+                source.next_poll = time.monotonic() + source.interval
+
+feed_scheduler = FeedScheduler()
@@ -1,32 +1,118 @@
 import googlemaps
 from modules import env, notion
+from modules.util import cache
 # import env
 import requests
 import urllib.parse
+import heapq
+import math
+import hashlib
+import threading
+import time
+import os
+from PIL import Image, ImageDraw
 
 GMAPS_TOKEN = env.GMAPS_TOKEN
 STATE_TAGS = env.STATE_TAGS
 AREA_DATABASE_ID = env.AREA_DATABASE_ID
 
+# The Distance Matrix API allows at most 25 destinations per request
+DISTANCE_MATRIX_MAX_DESTINATIONS = 25
+EARTH_RADIUS_KM = 6371.0
+GEOCODE_CACHE_FILE = cache.cache_path("geocode.json")
+GEOCODE_CACHE_MAX_ENTRIES = 5000
+# addresses without result are retried after this many seconds, the failure may have been temporary
+GEOCODE_FAILURE_TTL = 60 * 60
+
+# All static maps share the same center, only the marker moves
+MAP_CENTER = (50.6, 11)
+MAP_SIZE = (600, 640)
+MAP_CACHE_FOLDER = cache.cache_path("maps")
+MAP_BASE_FOLDER = cache.cache_path("maps", "base")
+MAP_CACHE_MAX_BYTES = 50 * 1024 * 1024
+MARKER_COLOR = "#EA4335"
+MARKER_OUTLINE_COLOR = "#B31412"
+
 gmaps = googlemaps.Client(key=GMAPS_TOKEN)
 
-def get_distances(origin, destinations):
-    # Call the Distance Matrix API
-    result = gmaps.distance_matrix(origins=origin, destinations=destinations)
+# address -> {"lat": ..., "lng": ...}, least recently used first, persisted so every event address is geocoded only once
+geocode_cache:dict[str, dict[str, float]] = {address: location for address, location in cache.load_json(GEOCODE_CACHE_FILE, {}).items() if location}
+# address -> time of the lookup without result, only kept in memory
+failed_geocodes:dict[str, float] = {}
+# lookups run in worker threads, writes of the cache file must not overlap
+geocode_cache_lock = threading.Lock()
 
-    # Initialize the result map
+def get_distances(origin, destinations):
     distances_map = {}
+    # Split into batches, the API rejects requests with too many destinations
+    for i in range(0, len(destinations), DISTANCE_MATRIX_MAX_DESTINATIONS):
+        batch = destinations[i:i + DISTANCE_MATRIX_MAX_DESTINATIONS]
+        # Call the Distance Matrix API
+        result = gmaps.distance_matrix(origins=origin, destinations=batch)
 
-    if result['status'] == 'OK':
-        elements = result['rows'][0]['elements']  # Get the array of results
-        distances_map = dict(zip(destinations, elements))  # Map destinations to elements
-    else:
-        # Handle errors
-        error_message = result.get("error_message", "Unknown error occurred")
-        raise Exception(f"Distance Matrix API Error: {error_message}")
+        if result['status'] == 'OK':
+            elements = result['rows'][0]['elements']  # Get the array of results
+            distances_map.update(zip(batch, elements))  # Map destinations to elements
+        else:
+            # Handle errors
+            error_message = result.get("error_message", "Unknown error occurred")
+            raise Exception(f"Distance Matrix API Error: {error_message}")
 
     return distances_map
 
+def haversine(coord1:"Coordinates", coord2:"Coordinates") -> float:
+    """
+    Great-circle distance between two coordinates in kilometers.
+    """
+    lat1, lat2 = math.radians(coord1.lat), math.radians(coord2.lat)
+    d_lat = lat2 - lat1
+    d_lng = math.radians(coord2.lng - coord1.lng)
+    a = math.sin(d_lat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(d_lng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def get_coordinates(address:str) -> "Coordinates|None":
+    """
+    Geocodes an address, using the persisted cache whenever possible. Addresses without result aren't asked again for GEOCODE_FAILURE_TTL.
+    """
+    with geocode_cache_lock:
+        location = geocode_cache.pop(address, None)
+        if location:
+            # move to the end, the least recently used addresses are trimmed first
+            geocode_cache[address] = location
+            return Coordinates(location)
+        failed_at = failed_geocodes.get(address)
+        if failed_at is not None and time.monotonic() - failed_at < GEOCODE_FAILURE_TTL:
+            return None
+
+    geocode_results = gmaps.geocode(address)
+    with geocode_cache_lock:
+        if not geocode_results:
+            now = time.monotonic()
+            for failed_address, failed_at in list(failed_geocodes.items()):
+                if now - failed_at >= GEOCODE_FAILURE_TTL:
+                    del failed_geocodes[failed_address]
+            failed_geocodes[address] = now
+            return None
+        failed_geocodes.pop(address, None)
+        location = geocode_results[0]['geometry']['location']
+        geocode_cache[address] = location
+        while len(geocode_cache) > GEOCODE_CACHE_MAX_ENTRIES:
+            del geocode_cache[next(iter(geocode_cache))]
+        cache.save_json(GEOCODE_CACHE_FILE, geocode_cache)
+    return Coordinates(location)
+
+def nearest_by_air(origin:"Coordinates", addresses:list[str], count:int) -> list[str]:
+    """
+    Ranks addresses by great-circle distance to origin without asking the routing API.
+    Addresses that can't be geocoded are dropped.
+    """
+    ranked = []
+    for address in set(addresses):
+        coord = get_coordinates(address)
+        if coord:
+            ranked.append((haversine(origin, coord), address))
+    return [address for _, address in heapq.nsmallest(count, ranked)]
+
 class Coordinates():
     def __init__(self, coordinates) -> None:
         self.lng = coordinates['lng']
@@ -122,17 +208,72 @@ class Location():
         return "https://www.google.com/maps/search/"+urllib.parse.quote(search_term)
 
     def get_static_map(self):
-        lng = self.coord.lng
-        lat = self.coord.lat
         zoom = 6 if self.country['short_name'] in ['DE', 'AT', 'CH'] else 4
-        map_url = f"https://maps.googleapis.com/maps/api/staticmap?center=50.6,11&zoom={zoom}&size=600x640&markers=color:red%257label:S%7C{lat},{lng}&language=de&key={GMAPS_TOKEN}"
-
-        response = requests.get(map_url)
-        # Save the file locally
-        self.file_name = f"google_map_{lat}_{lng}.png"
-        self.file_path = f"tmp/{self.file_name}"
-        with open(self.file_path, "wb") as file_maps:
-            file_maps.write(response.content)
+        self.file_path = get_static_map_file(self.coord.lat, self.coord.lng, zoom)
+        self.file_name = os.path.basename(self.file_path)
+
+def download_static_map(zoom:int, size:tuple[int, int]) -> bytes:
+    map_url = f"https://maps.googleapis.com/maps/api/staticmap?center={MAP_CENTER[0]},{MAP_CENTER[1]}&zoom={zoom}&size={size[0]}x{size[1]}&language=de&key={GMAPS_TOKEN}"
+    response = requests.get(map_url, timeout=10)
+    response.raise_for_status()
+    return response.content
+
+def get_base_map(zoom:int, size:tuple[int, int]) -> Image.Image:
+    """
+    The map without any marker. It only depends on zoom and size, so it is downloaded once per zoom level.
+    """
+    file_path = os.path.join(MAP_BASE_FOLDER, f"base_{zoom}_{size[0]}x{size[1]}.png")
+    if not os.path.exists(file_path):
+        os.makedirs(MAP_BASE_FOLDER, exist_ok=True)
+        with open(file_path, "wb") as file:
+            file.write(download_static_map(zoom, size))
+    with Image.open(file_path) as img:
+        return img.convert("RGB")
+
+def project_to_map(lat:float, lng:float, zoom:int, size:tuple[int, int]) -> tuple[float, float]:
+    """
+    Web Mercator projection of a coordinate to the pixel position on the static map.
+    """
+    def world_pixel(lat, lng):
+        scale = 256 * 2 ** zoom
+        siny = min(max(math.sin(math.radians(lat)), -0.9999), 0.9999)
+        x = scale * (lng + 180) / 360
+        y = scale * (0.5 - math.log((1 + siny) / (1 - siny)) / (4 * math.pi))
+        return x, y
+
+    center_x, center_y = world_pixel(*MAP_CENTER)
+    x, y = world_pixel(lat, lng)
+    return (x - center_x + size[0] / 2, y - center_y + size[1] / 2)
+
+def draw_marker(img:Image.Image, x:float, y:float):
+    """
+    Draws a map pin with its tip at (x, y).
+    """
+    draw = ImageDraw.Draw(img)
+    radius = 10
+    head_y = y - 26
+    draw.polygon([(x - 8, head_y + 6), (x + 8, head_y + 6), (x, y)], fill=MARKER_COLOR, outline=MARKER_OUTLINE_COLOR)
+    draw.ellipse([x - radius, head_y - radius, x + radius, head_y + radius], fill=MARKER_COLOR, outline=MARKER_OUTLINE_COLOR)
+    draw.ellipse([x - 3, head_y - 3, x + 3, head_y + 3], fill=MARKER_OUTLINE_COLOR)
+
+def get_static_map_file(lat:float, lng:float, zoom:int, size:tuple[int, int]=MAP_SIZE) -> str:
+    """
+    Returns the path to a rendered map with a marker at (lat, lng).
+    The marker is drawn locally onto the cached base map, the result is cached by content key.
+    """
+    key = hashlib.sha1(f"{lat:.6f},{lng:.6f}|{zoom}|{size[0]}x{size[1]}".encode()).hexdigest()[:20]
+    file_path = os.path.join(MAP_CACHE_FOLDER, f"google_map_{key}.png")
+    if os.path.exists(file_path):
+        cache.touch(file_path)
+        return file_path
+
+    os.makedirs(MAP_CACHE_FOLDER, exist_ok=True)
+    img = get_base_map(zoom, size)
+    draw_marker(img, *project_to_map(lat, lng, zoom, size))
+    img.save(file_path)
+
+    cache.enforce_quota(MAP_CACHE_FOLDER, MAP_CACHE_MAX_BYTES)
+    return file_path
 
 # def get_places(location:str, language="de", details=False):
 #     places_results = gmaps.places(location, language=language)['results']
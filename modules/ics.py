@@ -1,41 +1,159 @@
-import ics
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+from typing import BinaryIO, Iterable
+import hashlib
 from ezcord import log
+from modules import env
 
-def create_ics_file(file_name, event_name, start_datetime, end_datetime:datetime, description=None, location=None):
+PRODID = "-//Radio Ravnica//Discord Bot//DE"
+MAX_LINE_OCTETS = 75
+DEFAULT_DURATION = timedelta(hours=1)
+
+def escape_text(text:str) -> str:
     """
-    Creates a fully compliant .ics file with DTSTAMP and consistent CRLF line endings.
+    Escapes a TEXT value as required by RFC 5545.
     """
-    # Create a new calendar and event
-    calendar = ics.Calendar()
-    event = ics.Event()
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
 
-    # Set required event properties
-    event.name = event_name
-    log.debug(f"Creating event: {event_name} from {start_datetime} to {end_datetime}")
-    event.begin = start_datetime
-    event.end = end_datetime
-    if end_datetime and end_datetime == start_datetime:
-        event.end = end_datetime.replace(hour=end_datetime.hour + 1)
-    if start_datetime and not end_datetime:
-        event.end = start_datetime.replace(hour=start_datetime.hour + 1)
+def fold_line(line:str) -> str:
+    """
+    Folds a content line into chunks of at most 75 octets without splitting multi byte characters.
+    """
+    if len(line.encode("utf-8")) <= MAX_LINE_OCTETS:
+        return line
+    chunks = []
+    current = ""
+    size = 0
+    for char in line:
+        char_size = len(char.encode("utf-8"))
+        if size + char_size > MAX_LINE_OCTETS:
+            chunks.append(current)
+            # continuation lines start with a single space, which counts towards the limit
+            current = " "
+            size = 1
+        current += char
+        size += char_size
+    chunks.append(current)
+    return "\r\n".join(chunks)
 
-    # Add DTSTAMP (current UTC time)
-    event.created = datetime.now()
+def format_datetime(date:datetime) -> str:
+    # naive datetimes are local time
+    if date.tzinfo is None:
+        date = env.TIMEZONE.localize(date)
+    return date.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
 
-    # Optional properties
+def format_event(uid:str, event_name:str, start_datetime:datetime|None, end_datetime:datetime|None=None, description:str|None=None, location:str|None=None, url:str|None=None) -> str:
+    """
+    Renders a single VEVENT block, lines separated by CRLF. Without a start the event has no DTSTART and DTEND.
+    """
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{format_datetime(datetime.now(tz=timezone.utc))}",
+    ]
+    if start_datetime:
+        if not end_datetime or end_datetime == start_datetime:
+            end_datetime = start_datetime + DEFAULT_DURATION
+        lines.append(f"DTSTART:{format_datetime(start_datetime)}")
+        lines.append(f"DTEND:{format_datetime(end_datetime)}")
+    lines.append(f"SUMMARY:{escape_text(event_name)}")
     if description:
-        event.description = description
+        lines.append(f"DESCRIPTION:{escape_text(description)}")
     if location:
-        event.location = location
+        lines.append(f"LOCATION:{escape_text(location)}")
+    if url:
+        lines.append(f"URL:{url}")
+    lines.append("END:VEVENT")
+    return "\r\n".join(fold_line(line) for line in lines)
+
+def write_calendar(stream:BinaryIO, vevents:Iterable[str], calendar_name:str|None=None):
+    """
+    Streams a VCALENDAR with the given rendered VEVENT blocks into stream.
+    """
+    header = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+    ]
+    if calendar_name:
+        header.append(fold_line(f"X-WR-CALNAME:{escape_text(calendar_name)}"))
+    stream.write(("\r\n".join(header) + "\r\n").encode("utf-8"))
+    for vevent in vevents:
+        stream.write((vevent + "\r\n").encode("utf-8"))
+    stream.write(b"END:VCALENDAR\r\n")
+
+def create_ics_buffer(event_name, start_datetime:datetime|None, end_datetime:datetime|None, description=None, location=None) -> BytesIO:
+    """
+    Creates a single event calendar in memory, ready to be attached to a message.
+    """
+    log.debug(f"Creating event: {event_name} from {start_datetime} to {end_datetime}")
+    uid = hashlib.sha1(f"{event_name}|{start_datetime}".encode("utf-8")).hexdigest() + "@radio-ravnica"
+    buffer = BytesIO()
+    write_calendar(buffer, [format_event(uid, event_name, start_datetime, end_datetime, description=description, location=location)])
+    buffer.seek(0)
+    return buffer
+
+def create_ics_content(event_name, start_datetime:datetime|None, end_datetime:datetime|None, description=None, location=None) -> bytes:
+    return create_ics_buffer(event_name, start_datetime, end_datetime, description=description, location=location).getvalue()
+
+class CalendarFeed:
+    """
+    Calendar of many events. Every event is rendered once and only re-rendered when it changes,
+    the joined calendar is cached until the next change.
+    """
+    def __init__(self, calendar_name:str):
+        self.calendar_name = calendar_name
+        # uid -> (event fields, rendered VEVENT)
+        self.events:dict[str, tuple[tuple, str]] = {}
+        self._content:bytes|None = None
+        self._etag:str|None = None
+
+    def set_event(self, uid:str, event_name:str, start_datetime:datetime, end_datetime:datetime|None=None, description:str|None=None, location:str|None=None, url:str|None=None) -> bool:
+        """
+        Adds or updates an event. Returns False if nothing changed.
+        """
+        fields = (event_name, start_datetime, end_datetime, description, location, url)
+        cached = self.events.get(uid)
+        if cached and cached[0] == fields:
+            return False
+        self.events[uid] = (fields, format_event(uid, *fields))
+        self._content = None
+        return True
+
+    def remove_event(self, uid:str) -> bool:
+        if self.events.pop(uid, None) is None:
+            return False
+        self._content = None
+        return True
+
+    def remove_missing(self, uid_prefix:str, uids:set[str]):
+        """
+        Removes all events with uid_prefix that are not in uids.
+        """
+        for uid in [uid for uid in self.events if uid.startswith(uid_prefix) and uid not in uids]:
+            self.remove_event(uid)
 
-    # Add the event to the calendar
-    calendar.events.add(event)
+    def to_bytes(self) -> bytes:
+        if self._content is None:
+            buffer = BytesIO()
+            # sorted by start, so the output doesn't depend on the insertion order
+            vevents = [vevent for _, vevent in sorted(self.events.values(), key=lambda event: format_datetime(event[0][1]))]
+            write_calendar(buffer, vevents, self.calendar_name)
+            self._content = buffer.getvalue()
+            self._etag = hashlib.sha1(self._content).hexdigest()
+        return self._content
 
-    # Serialize the calendar
-    ics_content = calendar.serialize()
+    @property
+    def etag(self) -> str:
+        self.to_bytes()
+        return self._etag
 
-    # Save to file
-    with open(file_name, "wb") as file:
-        file.write(ics_content.encode("utf-8"))
-    return file_name
\ No newline at end of file
+calendar_feed = CalendarFeed("Radio Ravnica Events")
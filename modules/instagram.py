@@ -1,23 +1,59 @@
 import os
-from apify_client import ApifyClient
-import time
-
-def get_post_by_id(id: str, apify_token: str = None) -> str:
+import asyncio
+from datetime import datetime, timedelta
+from apify_client import ApifyClientAsync
+from ezcord import log
+from modules.util import cache
+
+ACTOR_ID = "apify/instagram-scraper"
+TERMINAL_STATUSES = {"SUCCEEDED", "FAILED", "ABORTED", "TIMED-OUT"}
+POLL_DELAY = 2 # seconds, doubled after every status check
+MAX_POLL_DELAY = 30
+RUN_TIMEOUT = 600 # seconds until a run is given up on
+LAST_RUNS_FILE = cache.cache_path("instagram", "last_runs.json")
+
+# profile -> {"dataset_id": dataset of the last run that returned posts, "newest": timestamp of the newest post seen}
+last_runs:dict[str, dict] = cache.load_json(LAST_RUNS_FILE, {})
+
+def create_client(apify_token: str = None) -> ApifyClientAsync:
     if apify_token is None:
         raise ValueError("Apify API token must be provided")
+    return ApifyClientAsync(apify_token)
 
-    client = ApifyClient(apify_token)
+async def run_actor(client: ApifyClientAsync, run_input: dict) -> dict:
+    """
+    Starts a run of the scraper and waits for it through the run status, checking less often the longer it takes.
+    """
+    run = await client.actor(ACTOR_ID).start(run_input=run_input)
+    delay = POLL_DELAY
+    waited = 0
+    while run["status"] not in TERMINAL_STATUSES:
+        if waited >= RUN_TIMEOUT:
+            # an abandoned run would keep running and costing
+            await client.run(run["id"]).abort()
+            raise TimeoutError(f"Apify run {run['id']} did not finish within {RUN_TIMEOUT} seconds")
+        await asyncio.sleep(delay)
+        waited += delay
+        delay = min(delay * 2, MAX_POLL_DELAY)
+        run = await client.run(run["id"]).get()
+    return run
+
+async def list_dataset(client: ApifyClientAsync, dataset_id: str) -> list[dict]:
+    return (await client.dataset(dataset_id).list_items()).items
+
+async def get_post_by_id(id: str, apify_token: str = None) -> dict:
+    client = create_client(apify_token)
 
     # Start the Instagram Scraper actor for a single post
-    run = client.actor("apify/instagram-scraper").call(run_input={
+    run = await run_actor(client, {
         "directUrls": [f"https://www.instagram.com/p/{id}"],
         "resultsType": "posts",
         "resultsLimit": 1,
     })
+    if run["status"] != "SUCCEEDED":
+        raise ValueError(f"Apify run for post {id} ended with status {run['status']}")
 
-    time.sleep(5)
-
-    dataset_items = client.dataset(run["defaultDatasetId"]).list_items().items
+    dataset_items = await list_dataset(client, run["defaultDatasetId"])
 
     if not dataset_items:
         raise ValueError(f"No post found for ID: {id}")
@@ -42,22 +78,27 @@ def extract_post_id(post_url_or_id: str) -> str:
     # If not a URL, assume it's already an ID
     return post_url_or_id
 
-def get_latest_instagram_posts(profile_username: str, max_posts: int = 5, apify_token: str = None):
+def newer_than(timestamp: str) -> str:
+    """
+    The cutoff for onlyPostsNewerThan, one second after the given post timestamp so that post itself isn't returned again.
+    """
+    return (datetime.fromisoformat(timestamp.replace("Z", "+00:00")) + timedelta(seconds=1)).isoformat()
+
+async def get_latest_instagram_posts(profile_username: str, max_posts: int = 5, apify_token: str = None) -> list[dict]:
     """
     Uses Apify's Instagram Scraper to fetch the latest posts from a public Instagram profile.
+    Only posts newer than the newest one seen so far are scraped. If there are none, the posts of the last run
+    that returned some are listed instead. Raises if the run doesn't succeed.
 
     :param profile_username: Instagram handle (e.g., 'nasa')
     :param max_posts: Max number of recent posts to return
     :param apify_token: Your Apify API token
     :return: List of dictionaries with post details
     """
-    if apify_token is None:
-        raise ValueError("Apify API token must be provided")
+    client = create_client(apify_token)
+    last_run = last_runs.get(profile_username, {})
 
-    client = ApifyClient(apify_token)
-
-    # Start the Instagram Scraper actor
-    run = client.actor("apify/instagram-scraper").call(run_input={
+    run_input = {
         "addParentData": False,
         "directUrls": [
             f"https://www.instagram.com/{profile_username}"
@@ -67,32 +108,36 @@ def get_latest_instagram_posts(profile_username: str, max_posts: int = 5, apify_
         "resultsLimit": max_posts,
         "resultsType": "posts",
         "searchLimit": 1,
-    })
-
-    # Wait briefly to ensure dataset is ready
-    time.sleep(5)
-
-    # Fetch the results (this automatically fetches dataset items)
-    dataset_items = client.dataset(run["defaultDatasetId"]).list_items().items
-
-    # Return structured post data
-    return dataset_items
+    }
+    if last_run.get("newest"):
+        # an unchanged profile then yields an empty run
+        run_input["onlyPostsNewerThan"] = newer_than(last_run["newest"])
+
+    run = await run_actor(client, run_input)
+    if run["status"] != "SUCCEEDED":
+        raise ValueError(f"Apify run for {profile_username} ended with status {run['status']}")
+
+    dataset_items = await list_dataset(client, run["defaultDatasetId"])
+    if dataset_items:
+        timestamps = [post["timestamp"] for post in dataset_items if post.get("timestamp")]
+        if last_run.get("newest"):
+            timestamps.append(last_run["newest"])
+        last_runs[profile_username] = {
+            "dataset_id": run["defaultDatasetId"],
+            "newest": max(timestamps) if timestamps else None
+        }
+        cache.save_json(LAST_RUNS_FILE, last_runs)
+        return dataset_items
+
+    log.debug(f"No new Instagram posts of {profile_username}")
+    if not last_run.get("dataset_id"):
+        return []
+    return await list_dataset(client, last_run["dataset_id"])
 
 # alle zwei Stunden abfragen
 if __name__ == "__main__":
     # Example usage
     apify_token = os.getenv("API_KEY_INSTAGRAM")
 
-    post = get_post_by_id("DLUOyLHCZtl", apify_token=apify_token)
-    # try:
-    #     posts = get_latest_instagram_posts("gamerii93", max_posts=5, apify_token=apify_token)
-    #     for post in posts:
-    #         print(f"is pinned: {post.get('isPinned', False)}")
-    #         print(f"Post ID: {post['id']}")
-    #         print(f"Caption: {post['caption']}")
-    #         print(f"Image URL: {post['image_url']}")
-    #         print(f"Timestamp: {post['timestamp']}")
-    #         print(f"Post URL: {post['post_url']}")
-    #         print("-" * 40)
-    # except Exception as e:
-    #     print(f"Error fetching posts: {e}")
\ No newline at end of file
+    post = asyncio.run(get_post_by_id("DLUOyLHCZtl", apify_token=apify_token))
+    print(post)
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+import asyncio
+import discord
+from ezcord import log
+
+QUERY_BATCH_SIZE = 100 # gateway limit for user_ids per member request
+NEGATIVE_TTL = timedelta(minutes=30)
+
+class MemberResolver:
+    """
+    Resolves members of any guild through the gateway cache and batched gateway member requests,
+    so looking up players never costs a REST call per user. Users that aren't members are remembered for NEGATIVE_TTL.
+    """
+    def __init__(self):
+        self.members:dict[tuple[int, int], discord.Member] = {}
+        # (guild id, user id) -> time until the user is considered missing
+        self.missing:dict[tuple[int, int], datetime] = {}
+
+    def get_cached(self, guild:discord.Guild, user_id:int) -> discord.Member|None:
+        return guild.get_member(user_id) or self.members.get((guild.id, user_id))
+
+    def is_known_missing(self, guild_id:int, user_id:int) -> bool:
+        expires = self.missing.get((guild_id, user_id))
+        if expires and expires > datetime.now():
+            return True
+        self.missing.pop((guild_id, user_id), None)
+        return False
+
+    async def resolve(self, guild:discord.Guild, user_ids) -> dict[int, discord.Member|None]:
+        result:dict[int, discord.Member|None] = {}
+        to_query = []
+        for user_id in dict.fromkeys(user_ids):
+            member = self.get_cached(guild, user_id)
+            if member:
+                result[user_id] = member
+            elif self.is_known_missing(guild.id, user_id):
+                result[user_id] = None
+            else:
+                to_query.append(user_id)
+
+        for i in range(0, len(to_query), QUERY_BATCH_SIZE):
+            batch = to_query[i:i+QUERY_BATCH_SIZE]
+            try:
+                found = await guild.query_members(user_ids=batch, limit=len(batch), cache=True)
+            except (asyncio.TimeoutError, discord.ClientException) as e:
+                # don't remember them as missing, the request itself failed
+                log.warning(f"Member request for {len(batch)} users in guild {guild.id} failed: {e}")
+                for user_id in batch:
+                    result[user_id] = None
+                continue
+            for member in found:
+                self.update(member)
+                result[member.id] = member
+            for user_id in batch:
+                if user_id not in result:
+                    self.missing[(guild.id, user_id)] = datetime.now() + NEGATIVE_TTL
+                    result[user_id] = None
+        return result
+
+    async def get(self, guild:discord.Guild, user_id:int) -> discord.Member|None:
+        return (await self.resolve(guild, [user_id]))[user_id]
+
+    def update(self, member:discord.Member):
+        self.members[(member.guild.id, member.id)] = member
+        self.missing.pop((member.guild.id, member.id), None)
+
+    def remove(self, guild_id:int, user_id:int):
+        self.members.pop((guild_id, user_id), None)
+        self.missing[(guild_id, user_id)] = datetime.now() + NEGATIVE_TTL
+
+member_resolver = MemberResolver()
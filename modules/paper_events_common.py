@@ -7,6 +7,7 @@ from enum import Enum
 from modules import date_time_interpretation as dti
 import re
 import textwrap
+from io import BytesIO
 from ezcord import log
 
 CHANNEL_PAPER_EVENTS_ID = env.CHANNEL_PAPER_EVENTS_ID
@@ -140,12 +141,17 @@ class FieldName(Enum):
     URL = "URL / Link"
     IMAGE = "Bild"
 
+# Fields that build_title() reads
+TITLE_DEPENDENCIES = [FieldName.TITLE, FieldName.FORMATS, FieldName.TYPE]
+EVENT_EMBED_DEPENDENCIES = TITLE_DEPENDENCIES + [FieldName.START, FieldName.END, FieldName.FEE, FieldName.URL, FieldName.IMAGE]
+
 class InputField:
     def __init__(self, name: FieldName, field_type: FieldType, mandatory: bool = False, icon:str = None, description=None, notion_column=None):
         self.name = name
         self.field_type = field_type
         self.mandatory = mandatory
         self._value = None
+        self.revision = 0 # increases with every change, used to invalidate derived artifacts
         self.icon = icon
         self.description = description
         self.notion_column:str = notion_column
@@ -170,6 +176,12 @@ class InputField:
     @value.setter
     def value(self, new_value):
         self._value = self.field_type.parse(new_value)
+        self.revision += 1
+
+CALENDAR_UID_PREFIX = "paper-event-"
+
+def calendar_uid(thread_id:int) -> str:
+    return f"{CALENDAR_UID_PREFIX}{thread_id}@radio-ravnica"
 
 def get_timestamp_style(timestamp1: datetime|None, timestamp2: datetime|None) -> Literal["t", "D", "f"]:
     """
@@ -386,6 +398,19 @@ class PaperEvent():
             InputField(FieldName.IMAGE, FIELD_TYPE_IMAGE, icon="🖼️", description="Repräsentiert die Veranstaltung. Wenn nicht angegeben: Versuch Bild aus Link"),
         ]
         self.fields:dict[FieldName, InputField] = {field.name: field for field in field_list}
+        self._artifacts:dict[str, tuple[tuple[int, ...], object]] = {}
+
+    def memoize(self, name:str, depends_on:list[FieldName], build):
+        """
+        Returns the cached artifact `name` as long as none of the fields it depends on changed, otherwise rebuilds it.
+        """
+        key = tuple(self.fields[field_name].revision for field_name in depends_on)
+        cached = self._artifacts.get(name)
+        if cached and cached[0] == key:
+            return cached[1]
+        artifact = build()
+        self._artifacts[name] = (key, artifact)
+        return artifact
     
     def fill_fields_from_notion_entry(self, entry:notion.Entry):
         self.fields[FieldName.TITLE].value = entry.get_text_property("Event Titel")
@@ -441,7 +466,25 @@ class PaperEvent():
             .add_text_filter("Server ID", notion.TextCondition.EQUALS, str(self.guild.id))
             .add_text_filter("Thread ID", notion.TextCondition.EQUALS, str(self.thread.id))
             .build())
-        return notion.add_or_update_entry(database_id=EVENT_DATABASE_ID, payload=payload.build(), filter=filter)
+        result = notion.add_or_update_entry(database_id=EVENT_DATABASE_ID, payload=payload.build(), filter=filter)
+        self.update_calendar_feed()
+        return result
+
+    def update_calendar_feed(self):
+        if not self.fields[FieldName.START].value:
+            # not on the calendar until it has a date
+            ics.calendar_feed.remove_event(calendar_uid(self.thread.id))
+            return
+        location:gmaps.Location|None = self.fields[FieldName.LOCATION].value
+        ics.calendar_feed.set_event(
+            calendar_uid(self.thread.id),
+            self.build_title(),
+            self.fields[FieldName.START].value,
+            self.fields[FieldName.END].value,
+            description=self.fields[FieldName.DESCRIPTION].value,
+            location=location.formatted_address if location else None,
+            url=self.thread.jump_url
+        )
 
     def build_title(self):
         title = self.fields[FieldName.TITLE].value
@@ -458,12 +501,32 @@ class PaperEvent():
         files = []
         location:gmaps.Location|None = self.fields[FieldName.LOCATION].value
         if location:
-            files.append(discord.File(location.file_path, filename=location.file_name))
-        title = self.build_title()
-        ics_file = ics.create_ics_file(f"tmp/{title}.ics", title, self.fields[FieldName.START].value, self.fields[FieldName.END].value, description=self.fields[FieldName.DESCRIPTION].value, location=location.formatted_address if location else None)
-        if ics_file:
-            files.append(discord.File(ics_file, filename=ics_file))
+            files.append(discord.File(BytesIO(self.get_map_bytes()), filename=location.file_name))
+        files.append(discord.File(BytesIO(self.get_ics_bytes()), filename=self.get_ics_file_name()))
         return files
+
+    def get_map_bytes(self) -> bytes:
+        def build():
+            location:gmaps.Location = self.fields[FieldName.LOCATION].value
+            with open(location.file_path, "rb") as file:
+                return file.read()
+        return self.memoize("map", [FieldName.LOCATION], build)
+
+    def get_ics_bytes(self) -> bytes:
+        def build():
+            location:gmaps.Location|None = self.fields[FieldName.LOCATION].value
+            return ics.create_ics_content(
+                self.build_title(),
+                self.fields[FieldName.START].value,
+                self.fields[FieldName.END].value,
+                description=self.fields[FieldName.DESCRIPTION].value,
+                location=location.formatted_address if location else None
+            )
+        return self.memoize("ics", TITLE_DEPENDENCIES + [FieldName.START, FieldName.END, FieldName.DESCRIPTION, FieldName.LOCATION], build)
+
+    def get_ics_file_name(self) -> str:
+        file_name = re.sub(r"[^\w.-]+", "_", self.build_title()).strip("_")
+        return f"{file_name or 'event'}.ics"
     
     def construct_thread_title(self):
         start:datetime|None = self.fields[FieldName.START].value
@@ -490,6 +553,9 @@ class PaperEvent():
         return content
 
     def construct_gmaps_embed(self) -> discord.Embed|None:
+        return self.memoize("gmaps_embed", [FieldName.LOCATION], self._construct_gmaps_embed)
+
+    def _construct_gmaps_embed(self) -> discord.Embed|None:
         location:gmaps.Location|None = self.fields[FieldName.LOCATION].value
         if not location:
             return None
@@ -509,6 +575,9 @@ class PaperEvent():
         return embed
     
     def construct_event_embed(self):
+        return self.memoize("event_embed", EVENT_EMBED_DEPENDENCIES, self._construct_event_embed)
+
+    def _construct_event_embed(self):
         start = self.fields[FieldName.START].value
         if start:
             start_value = f"{discord.utils.format_dt(start, 'f')}\n{discord.utils.format_dt(start, 'R')}"
@@ -0,0 +1,302 @@
+from collections import OrderedDict
+from io import BytesIO
+from datetime import datetime
+from urllib.parse import urlparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import unicodedata
+import aiohttp
+import requests
+from PIL import Image
+from ezcord import log
+from modules.util import cache
+from modules import env
+
+COLLECTION_URL = "https://api.scryfall.com/cards/collection"
+COLLECTION_BATCH_SIZE = 75 # Scryfall API limit
+IMAGE_TYPE = "border_crop"
+CARD_SIZE = (200, 280)
+
+CARDS_CACHE_FILE = cache.cache_path("scryfall", "cards.json")
+IMAGE_CACHE_FOLDER = cache.cache_path("scryfall", "images")
+IMAGE_CACHE_MAX_BYTES = 200 * 1024 * 1024
+MEMORY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+BULK_DATA_URL = "https://api.scryfall.com/bulk-data/default-cards"
+CARD_INDEX_FILE = cache.cache_path("scryfall", "card_index.json")
+BULK_INDEX_ENABLED = env.get_bool_from_env("SCRYFALL_BULK_INDEX")
+# printings that carry a real card's name without being that card
+SKIPPED_LAYOUTS = {"art_series", "token", "double_faced_token", "emblem"}
+SKIPPED_SET_TYPES = {"memorabilia", "token"}
+
+# Scryfall asks for 50-100 ms between API requests, the image CDN has no rate limit
+API_HOST = "api.scryfall.com"
+API_REQUEST_INTERVAL = 0.1
+DEFAULT_HOST_CONCURRENCY = 8
+HEADERS = {"User-Agent": "RadioRavnicaBot/1.0", "Accept": "application/json;q=0.9,*/*;q=0.8"}
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=15)
+
+# card name -> {"id": ..., "name": ..., "image_url": ...}
+card_cache:dict[str, dict] = cache.load_json(CARDS_CACHE_FILE, {})
+# normalized name -> [id, name, image_url], built from the bulk data when enabled
+card_index:dict[str, list[str]] = {}
+card_index_updated_at:str|None = None
+
+class HostLimiter:
+    """
+    Bounds the number of concurrent requests to a host and optionally spaces them out.
+    """
+    def __init__(self, concurrency:int, min_interval:float=0.0):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.min_interval = min_interval
+        self.next_slot = 0.0
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        if self.min_interval:
+            now = asyncio.get_running_loop().time()
+            wait = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.min_interval
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+    async def __aexit__(self, *exc_info):
+        self.semaphore.release()
+
+host_limiters:dict[str, HostLimiter] = {}
+
+def get_limiter(url:str) -> HostLimiter:
+    host = urlparse(url).netloc
+    if host not in host_limiters:
+        if host == API_HOST:
+            host_limiters[host] = HostLimiter(1, API_REQUEST_INTERVAL)
+        else:
+            host_limiters[host] = HostLimiter(DEFAULT_HOST_CONCURRENCY)
+    return host_limiters[host]
+
+def front_face_name(name:str) -> str:
+    return name.split(" // ")[0].strip()
+
+def image_url_from_card_data(card_data:dict) -> str|None:
+    image_uris = card_data.get("image_uris")
+    if not image_uris and card_data.get("card_faces"):
+        # If the card has multiple faces, we choose the first one
+        image_uris = card_data["card_faces"][0].get("image_uris")
+    if not image_uris:
+        return None
+    return image_uris.get(IMAGE_TYPE) or image_uris.get("large")
+
+def normalize_name(name:str) -> str:
+    """
+    Lower case, without accents and with uniform face separators, so "Lim-Dûl's Vault" matches "lim-dul's vault".
+    """
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    name = re.sub(r"\s*/+\s*", " // ", name)
+    return " ".join(name.casefold().split())
+
+def lookup_index(name:str) -> dict|None:
+    entry = card_index.get(normalize_name(name)) or card_index.get(normalize_name(front_face_name(name)))
+    if not entry:
+        return None
+    card_id, card_name, image_url = entry
+    return {"id": card_id, "name": card_name, "image_url": image_url}
+
+def lookup_card(name:str) -> dict|None:
+    return lookup_index(name) or card_cache.get(name) or card_cache.get(front_face_name(name))
+
+def load_card_index():
+    global card_index, card_index_updated_at
+    data = cache.load_json(CARD_INDEX_FILE, {})
+    card_index = data.get("cards", {})
+    card_index_updated_at = data.get("updated_at")
+
+def iter_bulk_cards(lines):
+    """
+    Scryfall's bulk files are a JSON array with one card per line, so they can be parsed line by line
+    instead of loading hundreds of megabytes at once.
+    """
+    for line in lines:
+        line = line.strip().rstrip(",")
+        if not line or line in ("[", "]"):
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            log.warning(f"Skipping unparsable line in Scryfall bulk data: {line[:80]}")
+
+def build_card_index(cards) -> dict[str, list[str]]:
+    index:dict[str, list[str]] = {}
+    # normalized name -> (is paper printing, release date) of the printing currently in the index
+    ranks:dict[str, tuple[bool, str]] = {}
+    for card_data in cards:
+        if card_data.get("layout") in SKIPPED_LAYOUTS or card_data.get("set_type") in SKIPPED_SET_TYPES:
+            continue
+        image_url = image_url_from_card_data(card_data)
+        if not image_url:
+            continue
+        # prefer paper printings, then the most recent one
+        rank = ("paper" in card_data.get("games", []), card_data.get("released_at", ""))
+        entry = [card_data["id"], card_data["name"], image_url]
+        aliases = {normalize_name(card_data["name"]), normalize_name(front_face_name(card_data["name"]))}
+        for alias in aliases:
+            if alias not in ranks or rank > ranks[alias]:
+                index[alias] = entry
+                ranks[alias] = rank
+    return index
+
+def download_card_index(download_uri:str, updated_at:str):
+    started = datetime.now()
+    with requests.get(download_uri, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        index = build_card_index(iter_bulk_cards(response.iter_lines(decode_unicode=True)))
+    cache.save_json(CARD_INDEX_FILE, {"updated_at": updated_at, "cards": index})
+    log.info(f"Built Scryfall card index with {len(index)} names in {datetime.now() - started}")
+
+async def refresh_card_index():
+    """
+    Rebuilds the local card index if Scryfall published newer bulk data.
+    """
+    async with aiohttp.ClientSession(headers=HEADERS, timeout=REQUEST_TIMEOUT) as session:
+        async with get_limiter(BULK_DATA_URL):
+            async with session.get(BULK_DATA_URL) as response:
+                response.raise_for_status()
+                bulk_data = await response.json()
+    if bulk_data["updated_at"] == card_index_updated_at:
+        return
+    await asyncio.to_thread(download_card_index, bulk_data["download_uri"], bulk_data["updated_at"])
+    await asyncio.to_thread(load_card_index)
+
+if BULK_INDEX_ENABLED:
+    load_card_index()
+
+async def request_cards(names:list[str]) -> dict[str, dict]:
+    """
+    Resolves card names to Scryfall metadata. Only names that were never resolved before hit the API.
+    """
+    missing = set()
+    for name in names:
+        if not lookup_card(name):
+            missing.add(name)
+            if "//" in name:
+                missing.add(front_face_name(name))
+
+    identifiers = [{"name": name} for name in missing]
+    batches = [identifiers[i:i+COLLECTION_BATCH_SIZE] for i in range(0, len(identifiers), COLLECTION_BATCH_SIZE)]
+    if not batches:
+        return {name: card for name in names if (card := lookup_card(name))}
+
+    async def post_batch(session:aiohttp.ClientSession, batch:list[dict]) -> dict|None:
+        async with get_limiter(COLLECTION_URL):
+            async with session.post(COLLECTION_URL, json={"identifiers": batch}) as response:
+                if response.status != 200:
+                    log.error(f"Failed to fetch card images from Scryfall: {response.status}")
+                    return None
+                return await response.json()
+
+    async with aiohttp.ClientSession(headers=HEADERS, timeout=REQUEST_TIMEOUT) as session:
+        results = await asyncio.gather(*(post_batch(session, batch) for batch in batches))
+
+    added = False
+    for data in results:
+        if not data:
+            continue
+        if data.get("not_found"):
+            log.warning(f"Cards not found: {data['not_found']}")
+        for card_data in data.get("data", []):
+            image_url = image_url_from_card_data(card_data)
+            if not image_url:
+                log.error(f"No image found for {card_data['name']} in Scryfall response")
+                continue
+            metadata = {"id": card_data["id"], "name": card_data["name"], "image_url": image_url}
+            card_cache[card_data["name"]] = metadata
+            if "//" in card_data["name"]:
+                card_cache[front_face_name(card_data["name"])] = metadata
+            added = True
+    if added:
+        cache.save_json(CARDS_CACHE_FILE, card_cache)
+
+    return {name: card for name in names if (card := lookup_card(name))}
+
+class ImageMemoryCache:
+    """
+    Least recently used images, bounded by their decoded size.
+    """
+    def __init__(self, max_bytes:int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.images:OrderedDict[str, Image.Image] = OrderedDict()
+
+    @staticmethod
+    def image_bytes(img:Image.Image) -> int:
+        return img.width * img.height * len(img.getbands())
+
+    def get(self, key:str) -> Image.Image|None:
+        img = self.images.get(key)
+        if img is not None:
+            self.images.move_to_end(key)
+        return img
+
+    def put(self, key:str, img:Image.Image):
+        if key in self.images:
+            self.size -= self.image_bytes(self.images.pop(key))
+        self.images[key] = img
+        self.size += self.image_bytes(img)
+        while self.size > self.max_bytes and len(self.images) > 1:
+            _, evicted = self.images.popitem(last=False)
+            self.size -= self.image_bytes(evicted)
+
+memory_cache = ImageMemoryCache(MEMORY_CACHE_MAX_BYTES)
+
+def image_cache_key(image_url:str, size:tuple[int, int]) -> str:
+    return hashlib.sha1(f"{image_url}|{size[0]}x{size[1]}".encode("utf-8")).hexdigest()
+
+def load_cached_image(file_path:str) -> Image.Image|None:
+    if not os.path.exists(file_path):
+        return None
+    with Image.open(file_path) as cached:
+        img = cached.convert("RGB")
+    cache.touch(file_path)
+    return img
+
+def decode_and_store(content:bytes, size:tuple[int, int], file_path:str) -> Image.Image:
+    with Image.open(BytesIO(content)) as downloaded:
+        img = downloaded.convert("RGB").resize(size)
+    os.makedirs(IMAGE_CACHE_FOLDER, exist_ok=True)
+    img.save(file_path)
+    return img
+
+async def get_card_image(session:aiohttp.ClientSession, image_url:str, size:tuple[int, int]=CARD_SIZE) -> Image.Image:
+    """
+    Returns the card image resized to size. Looks in memory first, then on disk, then downloads it.
+    Decoding and resizing run in a worker thread.
+    """
+    key = image_cache_key(image_url, size)
+    img = memory_cache.get(key)
+    if img is not None:
+        return img
+
+    file_path = os.path.join(IMAGE_CACHE_FOLDER, f"{key}.png")
+    img = await asyncio.to_thread(load_cached_image, file_path)
+    if img is None:
+        async with get_limiter(image_url):
+            async with session.get(image_url) as response:
+                response.raise_for_status()
+                content = await response.read()
+        img = await asyncio.to_thread(decode_and_store, content, size, file_path)
+
+    memory_cache.put(key, img)
+    return img
+
+async def get_card_images(image_urls:list[str], size:tuple[int, int]=CARD_SIZE) -> dict[str, Image.Image]:
+    """
+    Fetches all images concurrently, bounded per host.
+    """
+    unique_urls = list(dict.fromkeys(image_urls))
+    async with aiohttp.ClientSession(headers=HEADERS, timeout=REQUEST_TIMEOUT) as session:
+        images = await asyncio.gather(*(get_card_image(session, url, size) for url in unique_urls))
+    await asyncio.to_thread(cache.enforce_quota, IMAGE_CACHE_FOLDER, IMAGE_CACHE_MAX_BYTES)
+    return dict(zip(unique_urls, images))
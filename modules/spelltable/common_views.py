@@ -1,12 +1,16 @@
+import asyncio
 import discord
 import logging
 from modules import swiss_mtg
-from modules.spelltable.tournament_model import SpelltableTournament, use_custom_try, ParticipationState
+from modules.spelltable.tournament_model import SpelltableTournament, use_custom_try, ParticipationState, image_files
+from modules.spelltable import notifications
 from modules import env
 from ezcord import log
 
 link_log = logging.getLogger("link_logger")
 
+REFRESH_DELAY = 2 # seconds, reports arriving in this time are published together
+
 class FinishTournamentView(discord.ui.View):
     def __init__(self):
         raise RuntimeError("Use 'await FinishTournamentView.create(...)' instead")
@@ -27,32 +31,35 @@ class FinishTournamentView(discord.ui.View):
             await interaction.respond("Nur der Turnier-Organisator darf dies tun.", ephemeral=True)
             return
 
-        swiss_mtg.sort_players_by_standings(self.tournament.swiss_tournament.players)
-        winner = None
-        for player in self.tournament.swiss_tournament.players:
-            if not player.dropped:
-                winner = player
-                break
+        # the refresh queue may hold the lock for a moment, acknowledge first
+        await interaction.response.defer()
+        async with self.tournament.lock:
+            swiss_mtg.sort_players_by_standings(self.tournament.swiss_tournament.players)
+            winner = None
+            for player in self.tournament.swiss_tournament.players:
+                if not player.dropped:
+                    winner = player
+                    break
 
-        if winner:
-            content = f"🎉 Das Turnier ist abgeschlossen! 🎉\nHerzlichen Glückwunsch an <@{winner.player_id}> für den großartigen Sieg! 🏆\nVielen Dank an alle Teilnehmer für ein spannendes und unterhaltsames Turnier! 🎊"
+            if winner:
+                content = f"🎉 Das Turnier ist abgeschlossen! 🎉\nHerzlichen Glückwunsch an <@{winner.player_id}> für den großartigen Sieg! 🏆\nVielen Dank an alle Teilnehmer für ein spannendes und unterhaltsames Turnier! 🎊"
 
-            # Remove views from the last round pairings and standings messages
-            current_round = self.tournament.swiss_tournament.current_round()
-            pairings_message = await self.tournament.get_message(current_round.message_id_pairings)
-            standings_message = await self.tournament.get_message(current_round.message_id_standings)
+                # Remove views from the last round pairings and standings messages
+                current_round = self.tournament.swiss_tournament.current_round()
+                pairings_message = await self.tournament.get_message(current_round.message_id_pairings)
+                standings_message = await self.tournament.get_message(current_round.message_id_standings)
 
-            if pairings_message:
-                await pairings_message.edit(view=None)
-            if standings_message:
-                await standings_message.edit(view=None)
+                if pairings_message:
+                    await pairings_message.edit(view=None)
+                if standings_message:
+                    await standings_message.edit(view=None)
 
-            await interaction.response.send_message(content, ephemeral=False)
-            link_log.info(f"Turnier abgeschlossen: `{self.tournament.title}`, Gewinner: <@{winner.player_id}>")
-            self.tournament.swiss_tournament.winner = winner
-            await self.tournament.save_tournament()
-        else:
-            await interaction.respond("Kein Gewinner gefunden. Das sollte nicht passieren.", ephemeral=True)
+                await interaction.followup.send(content)
+                link_log.info(f"Turnier abgeschlossen: `{self.tournament.title}`, Gewinner: <@{winner.player_id}>")
+                self.tournament.swiss_tournament.winner = winner
+                await self.tournament.save_tournament()
+            else:
+                await interaction.followup.send("Kein Gewinner gefunden. Das sollte nicht passieren.", ephemeral=True)
 
 
 class ReportMatchModal(discord.ui.Modal):
@@ -106,23 +113,29 @@ class ReportMatchModal(discord.ui.Modal):
         score1 = int(self.p1_score.value) if self.p1_score.value else 0
         score2 = int(self.p2_score.value) if self.p2_score.value else 0
         draw_score = int(self.draw_score.value) if self.draw_score.value else 0
-        try:
-            self.match.set_result(score1, score2, draw_score)
-        except ValueError as e:
-            await interaction.respond(f"Dein Match Resultat {score1}-{score2}-{draw_score} ist invalide: {e}", ephemeral=True)
+        error = None
+        async with self.tournament.lock:
+            # the next round may have been paired while the modal was open
+            if self.round.round_number != self.tournament.swiss_tournament.current_round().round_number:
+                error = f"Die {self.round.round_number}. Runde ist bereits vorbei, das Resultat kann nicht mehr eingetragen werden."
+            else:
+                try:
+                    self.match.set_result(score1, score2, draw_score)
+                except ValueError as e:
+                    error = f"Dein Match Resultat {score1}-{score2}-{draw_score} ist invalide: {e}"
+            if not error and env.DEBUG:
+                swiss_mtg.simulate_remaining_matches(self.tournament.swiss_tournament)
+        if error:
+            await interaction.respond(error, ephemeral=True)
             return
         
         await interaction.response.defer()
         message_to_opponend = f"{interaction.user.mention} lässt ausrichten:\n> {self.personalized_message.value}" if self.personalized_message.value else "GGs!"
         gg_message = await interaction.followup.send(f"{self.player1_user.mention} {score1} - {score2} {self.player2_user.mention}{f' ({draw_score} Unentschieden)' if draw_score else ''}\n{message_to_opponend}", wait=True)
 
-        if env.DEBUG:
-            swiss_mtg.simulate_remaining_matches(self.tournament.swiss_tournament)
-
         log_text = f"Match result submitted: {self.player1_user.mention} vs {self.player2_user.mention} → {score1}-{score2}-{draw_score}"
         link_log.info(f"{log_text} in {gg_message.jump_url}")
-        await self.tournament.update_pairings(self.round)
-        await update_standings(self.tournament, interaction)
+        request_refresh(self.tournament, self.round, [self.match.player1.player_id, self.match.player2.player_id], interaction)
 
 class ConfirmDropModal(discord.ui.Modal):
     def __init__(self, player:swiss_mtg.Player, tournament:SpelltableTournament):
@@ -141,22 +154,53 @@ class ConfirmDropModal(discord.ui.Modal):
         if self.drop_input.value != "DROP":
             await interaction.respond("Turnier ausscheidung fehlgeschlagen", ephemeral=True)
             return
-        self.player.dropped = True
-        
-        # update matchups, i.e. strike through dropped player
-        current_round = self.tournament.swiss_tournament.current_round()
-        await self.tournament.update_pairings(current_round)
+        async with self.tournament.lock:
+            already_dropped = self.player.dropped
+            self.player.dropped = True
+            current_round = self.tournament.swiss_tournament.current_round()
+        if already_dropped:
+            await interaction.respond("Du bist bereits aus diesem Turnier ausgetreten", ephemeral=True)
+            return
+        await interaction.response.send_message("Du wurdest aus dem Turnier entfernt", ephemeral=True)
 
-        # update standings, i.e. strike through dropped player
-        await update_standings(self.tournament, interaction)
+        # strike through dropped player in pairings and standings
+        request_refresh(self.tournament, current_round, [self.player.player_id], interaction)
 
         message_pairings = await self.tournament.get_message(current_round.message_id_pairings)
 
         link_log.info(f"User {interaction.user.mention} dropped from tournament {message_pairings.jump_url}")
-        await interaction.response.send_message("Du wurdest aus dem Turnier entfernt", ephemeral=True)
-
 
-async def update_standings(tournament:SpelltableTournament, interaction: discord.Interaction):
+def request_refresh(tournament:SpelltableTournament, round:swiss_mtg.Round, player_ids, interaction:discord.Interaction):
+    """
+    Queues updating the pairings of round and the standings after a result or drop. player_ids changed their pairing lines, None for all.
+    Everything queued until the refresh runs is published with one pairings render, one standings render and one save.
+    """
+    if player_ids is None or tournament.pending_refresh.get(round.round_number, set()) is None:
+        tournament.pending_refresh[round.round_number] = None
+    else:
+        tournament.pending_refresh.setdefault(round.round_number, set()).update(player_ids)
+    # standings are posted as followup, the latest interaction has the longest valid token
+    tournament.refresh_interaction = interaction
+    if not tournament.refresh_task or tournament.refresh_task.done():
+        tournament.refresh_task = notifications.run_in_background(run_refreshes(tournament))
+
+async def run_refreshes(tournament:SpelltableTournament):
+    while tournament.pending_refresh:
+        await asyncio.sleep(REFRESH_DELAY)
+        async with tournament.lock:
+            pending, tournament.pending_refresh = tournament.pending_refresh, {}
+            interaction = tournament.refresh_interaction
+
+            async def do_the_thing():
+                for round in tournament.swiss_tournament.rounds:
+                    if round.round_number in pending and round.message_id_pairings:
+                        await tournament.update_pairings(round, pending[round.round_number], save=False)
+                await update_standings(tournament, interaction, save=False)
+                await tournament.save_tournament()
+            await use_custom_try("Ergebnisse Veröffentlichen", do_the_thing, tournament)
+
+
+async def update_standings(tournament:SpelltableTournament, interaction: discord.Interaction, save=True):
     current_round = tournament.swiss_tournament.current_round()
     if not current_round.is_concluded():
         # as long as the current round has not concluded, don't post standings
@@ -164,8 +208,7 @@ async def update_standings(tournament:SpelltableTournament, interaction: discord
     message_standings = await tournament.get_message(current_round.message_id_standings)
 
     content = f"Platzierungen nach der {tournament.swiss_tournament.current_round().round_number}. Runde"
-    standings_image = await tournament.standings_to_image()
-    standings_file = discord.File(standings_image, filename=standings_image)
+    standings_files = image_files(await tournament.standings_to_images())
 
     if current_round.round_number >= tournament.swiss_tournament.rounds_count:
         # letzte Runde
@@ -174,10 +217,10 @@ async def update_standings(tournament:SpelltableTournament, interaction: discord
         view = await StartNextRoundView.create(current_round, tournament)
 
     if message_standings:
-        await message_standings.edit(content=content, view=view, attachments=[], file=standings_file)
+        await message_standings.edit(content=content, view=view, attachments=[], files=standings_files)
     else:
         async def do_the_thing():
-            message_standings = await interaction.followup.send(content=content, view=view, file=standings_file)
+            message_standings = await interaction.followup.send(content=content, view=view, files=standings_files)
             # dm organizer
             to = await tournament.organizer
             can_do = None
@@ -189,7 +232,8 @@ async def update_standings(tournament:SpelltableTournament, interaction: discord
             current_round.message_id_standings = message_standings.id
         await use_custom_try("Platzierungen Senden", do_the_thing, tournament)
 
-    await tournament.save_tournament()
+    if save:
+        await tournament.save_tournament()
 
 class ConfirmKickView(discord.ui.View):
     def __init__(self, tournament:SpelltableTournament, user_to_kick:discord.Member):
@@ -200,18 +244,18 @@ class ConfirmKickView(discord.ui.View):
     @discord.ui.button(label="Rauswerfen", style=discord.ButtonStyle.danger, emoji="🚷")
     async def kick_button(self, button: discord.ui.Button, interaction: discord.Interaction):
         await interaction.response.defer()
-        if self.tournament.swiss_tournament:
-            # tournament ongoing
-            player_to_drop = self.tournament.swiss_tournament.player_by_id(self.user_to_kick.id)
-            if player_to_drop:
-                player_to_drop.dropped = True
-                await update_standings(self.tournament, interaction)
-                await self.tournament.update_pairings(self.tournament.swiss_tournament.current_round())
+        async with self.tournament.lock:
+            if self.tournament.swiss_tournament:
+                # tournament ongoing
+                player_to_drop = self.tournament.swiss_tournament.player_by_id(self.user_to_kick.id)
+                if player_to_drop:
+                    player_to_drop.dropped = True
+                    request_refresh(self.tournament, self.tournament.swiss_tournament.current_round(), [player_to_drop.player_id], interaction)
+                else:
+                    log.error(f"Player with id {self.user_to_kick.id} in Swiss Tournament not found")
             else:
-                log.error(f"Player with id {self.user_to_kick.id} in Swiss Tournament not found")
-        else:
-            # tournament registration is still going on
-            await self.tournament.user_state(self.user_to_kick.id, ParticipationState.DECLINE)
+                # tournament registration is still going on
+                await self.tournament.user_state(self.user_to_kick.id, ParticipationState.DECLINE)
         orig_response = await interaction.original_response()
         if self.tournament.swiss_tournament:
             message_id_pairings = self.tournament.swiss_tournament.current_round().message_id_pairings
@@ -236,12 +280,13 @@ class CancelTournamentModal(discord.ui.Modal):
 
     async def callback(self, interaction: discord.Interaction):
         await interaction.response.send_message("Das Turnier wird abgebrochen...", ephemeral=True)
-        tourney_message = await self.tournament.message
-        self.tournament.cancelled = self.cancel_input.value
-        cancel_message = await tourney_message.channel.send(f"🛑 Das Turnier `{self.tournament.title}` wurde abgebrochen:\n> {self.cancel_input.value}")
-        link_log.info(f"Turnier `{self.tournament.title}` {cancel_message.jump_url} wurde abgebrochen")
-        await interaction.message.edit(view=None)
-        await self.tournament.save_tournament()
+        async with self.tournament.lock:
+            tourney_message = await self.tournament.message
+            self.tournament.cancelled = self.cancel_input.value
+            cancel_message = await tourney_message.channel.send(f"🛑 Das Turnier `{self.tournament.title}` wurde abgebrochen:\n> {self.cancel_input.value}")
+            link_log.info(f"Turnier `{self.tournament.title}` {cancel_message.jump_url} wurde abgebrochen")
+            await interaction.message.edit(view=None)
+            await self.tournament.save_tournament()
 
 class KickPlayerModal(discord.ui.Modal):
     def __init__(self, tournament:SpelltableTournament):
@@ -257,42 +302,43 @@ class KickPlayerModal(discord.ui.Modal):
 
     async def callback(self, interaction: discord.Interaction):
         await interaction.response.defer()
-        user_id = None
-        user_name = None
-        user_to_kick = None
-        try:
-            user_id:int = int(self.kick_input.value)
-        except:
-            user_name:str = self.kick_input.value
-        if self.tournament.swiss_tournament:
-            participant_ids = [player.player_id for player in self.tournament.swiss_tournament.get_active_players()]
-        else:
-            participant_ids = self.tournament.get_users_by_state(ParticipationState.PARTICIPATE)
-        if user_id:
-            if user_id in participant_ids:
-                user_to_kick:discord.Member = await self.tournament.get_member(user_id)
+        async with self.tournament.lock:
+            user_id = None
+            user_name = None
+            user_to_kick = None
+            try:
+                user_id:int = int(self.kick_input.value)
+            except:
+                user_name:str = self.kick_input.value
+            if self.tournament.swiss_tournament:
+                participant_ids = [player.player_id for player in self.tournament.swiss_tournament.get_active_players()]
             else:
-                await interaction.respond(f"Kein User mit der ID `{user_id}` ist für das Turnier angemeldet.", ephemeral=True)
-                return
-        elif user_name:
-            for participant_id in participant_ids:
-                member = await self.tournament.get_member(participant_id)
-                if user_name.lower() in member.display_name.lower():
-                    user_to_kick = member
-                    break
-        else:
-            await interaction.respond(f"Unerwarteter Fehler.", ephemeral=True)
-        if user_to_kick:
-            # lasse bestätigen
-            await interaction.respond(f"Diesen Spieler rauswerfen? {user_to_kick.mention}", view=ConfirmKickView(self.tournament, user_to_kick), ephemeral=True)
-        else:
+                participant_ids = self.tournament.get_users_by_state(ParticipationState.PARTICIPATE)
             if user_id:
-                await interaction.respond(f"User mit der ID `{user_id}` nicht gefunden.", ephemeral=True)
+                if user_id in participant_ids:
+                    user_to_kick:discord.Member = await self.tournament.get_member(user_id)
+                else:
+                    await interaction.respond(f"Kein User mit der ID `{user_id}` ist für das Turnier angemeldet.", ephemeral=True)
+                    return
             elif user_name:
-                await interaction.respond(f"Teilnehmer mit dem Namen `{user_name}` nicht gefunden.", ephemeral=True)
+                for participant_id in participant_ids:
+                    member = await self.tournament.get_member(participant_id)
+                    if user_name.lower() in member.display_name.lower():
+                        user_to_kick = member
+                        break
             else:
                 await interaction.respond(f"Unerwarteter Fehler.", ephemeral=True)
-        await self.tournament.save_tournament()
+            if user_to_kick:
+                # lasse bestätigen
+                await interaction.respond(f"Diesen Spieler rauswerfen? {user_to_kick.mention}", view=ConfirmKickView(self.tournament, user_to_kick), ephemeral=True)
+            else:
+                if user_id:
+                    await interaction.respond(f"User mit der ID `{user_id}` nicht gefunden.", ephemeral=True)
+                elif user_name:
+                    await interaction.respond(f"Teilnehmer mit dem Namen `{user_name}` nicht gefunden.", ephemeral=True)
+                else:
+                    await interaction.respond(f"Unerwarteter Fehler.", ephemeral=True)
+            await self.tournament.save_tournament()
 
 class ReportMatchView(discord.ui.View):
     def __init__(self):
@@ -311,10 +357,9 @@ class ReportMatchView(discord.ui.View):
     
     async def simulate_on_not_playing(self, tournament:SpelltableTournament, round:swiss_mtg.Round, interaction:discord.Interaction):
         if env.DEBUG:
-            swiss_mtg.simulate_remaining_matches(tournament.swiss_tournament)
-
-            await tournament.update_pairings(round)
-            await update_standings(tournament, interaction)
+            async with tournament.lock:
+                swiss_mtg.simulate_remaining_matches(tournament.swiss_tournament)
+            request_refresh(tournament, round, None, interaction)
 
     @discord.ui.button(label="Report Match Result", style=discord.ButtonStyle.primary)
     async def report_button(self, button: discord.ui.Button, interaction: discord.Interaction):
@@ -371,17 +416,57 @@ class ReportMatchView(discord.ui.View):
             return
         await interaction.response.send_modal(CancelTournamentModal(self.tournament))
 
+async def notify_pairings(tournament:SpelltableTournament, round:swiss_mtg.Round, pairings_message:discord.Message, interaction:discord.Interaction):
+    """
+    Sends every player their opponent and reports the delivery to whoever started the round.
+    """
+    player_ids = [match.player1.player_id for match in round.matches]
+    player_ids += [match.player2.player_id for match in round.matches if not match.is_bye()]
+    members = await tournament.get_members(player_ids)
+
+    def display_name(player_id):
+        member = members.get(player_id)
+        return member.display_name if member else str(player_id)
+
+    messages:list[tuple[discord.Member, str]] = []
+    for match in round.matches:
+        user1 = members.get(match.player1.player_id)
+        if type(user1) != discord.Member:
+            user1 = None
+        if match.is_bye():
+            # bye
+            if user1:
+                messages.append((user1, f"Du hast ein BYE in der {round.round_number}. Runde im Turnier `{tournament.title}`: {pairings_message.jump_url}"))
+        else:
+            user2 = members.get(match.player2.player_id)
+            if type(user2) != discord.Member:
+                user2 = None
+            if user1:
+                messages.append((user1, f"🤺 Du spielst gegen <@{match.player2.player_id}> ({display_name(match.player2.player_id)}) in der {round.round_number}. Runde im Turnier `{tournament.title}`: {pairings_message.jump_url}"))
+            if user2:
+                messages.append((user2, f"🤺 Du spielst gegen <@{match.player1.player_id}> ({display_name(match.player1.player_id)}) in der {round.round_number}. Runde im Turnier `{tournament.title}`: {pairings_message.jump_url}"))
+
+    failed = await notifications.send_direct_messages(messages)
+    summary = f"📨 {len(messages) - len(failed)} von {len(messages)} Direktnachrichten zur {round.round_number}. Runde zugestellt."
+    unreachable = set(player_ids) - {member.id for member, _ in messages}
+    if failed or unreachable:
+        mentions = [f"<@{member.id}>" for member, _ in failed] + [f"<@{player_id}>" for player_id in unreachable]
+        summary += f"\nNicht erreicht: {', '.join(mentions)}"
+    try:
+        await interaction.followup.send(summary, ephemeral=True)
+    except discord.HTTPException as e:
+        log.error(f"Could not send delivery summary: {e}")
+
 async def next_round(tournament:SpelltableTournament, interaction:discord.Interaction):
     async def do_the_thing():
         previous_round = tournament.swiss_tournament.current_round()
         round = tournament.swiss_tournament.pair_players()
         await interaction.followup.send(f"Berechne Paarungen für Runde {round.round_number} ...", ephemeral=True)
         reportMatchView = await ReportMatchView.create(round, tournament)
-        pairings_image = await tournament.pairings_to_image()
-        pairings_file = discord.File(pairings_image, filename=pairings_image)
+        pairings_files = image_files(await tournament.pairings_to_images())
         try:
-            pairings = await tournament.get_pairings()
-            new_pairings_message:discord.Message = await interaction.followup.send(content=f"Paarungen für die {round.round_number}. Runde:\n\n{pairings}", file=pairings_file, view=reportMatchView)
+            pairings_content = await tournament.pairings_content(round)
+            new_pairings_message:discord.Message = await interaction.followup.send(content=pairings_content, files=pairings_files, view=reportMatchView)
             await new_pairings_message.pin()
 
             if previous_round:
@@ -391,9 +476,8 @@ async def next_round(tournament:SpelltableTournament, interaction:discord.Intera
             log.error(f"Failed to send pairings message: {e}")
             await interaction.followup.send("Fehler beim Senden der Paarungen. Bitte versuche es später erneut.", ephemeral=True)
             previous_standings_message = await tournament.get_message(previous_round.message_id_standings)
-            standings_image = await tournament.standings_to_image(previous_round)
-            standings_file = discord.File(standings_image, filename=standings_image)
-            await previous_standings_message.edit(attachments=[], file=standings_file, view=await StartNextRoundView.create(previous_round, tournament))
+            standings_files = image_files(await tournament.standings_to_images(previous_round))
+            await previous_standings_message.edit(attachments=[], files=standings_files, view=await StartNextRoundView.create(previous_round, tournament))
             return
 
         if not isinstance(new_pairings_message, discord.Message):
@@ -401,42 +485,11 @@ async def next_round(tournament:SpelltableTournament, interaction:discord.Intera
         round.message_id_pairings = new_pairings_message.id
         await tournament.save_tournament()
 
-        # message players direcly
-        for match in round.matches:
-            try:
-                user1 = await tournament.get_member(match.player1.player_id)
-                if type(user1) != discord.Member:
-                    user1 = None
-            except discord.NotFound:
-                user1 = None
-            if match.is_bye():
-                # bye
-                if user1:
-                    try:
-                        await user1.send(f"Du hast ein BYE in der {round.round_number}. Runde im Turnier `{tournament.title}`: {new_pairings_message.jump_url}")
-                    except discord.Forbidden:
-                        log.error(f"Could not send message to {user1.display_name} ({user1.id})")
-            else:
-                try:
-                    user2 = await tournament.get_member(match.player2.player_id)
-                    if type(user2) != discord.Member:
-                        user2 = None
-                except discord.NotFound:
-                    user2 = None
-                if user1:
-                    try:
-                        p2_member = await tournament.get_member(match.player2.player_id)
-                        await user1.send(f"🤺 Du spielst gegen <@{match.player2.player_id}> ({p2_member.display_name}) in der {round.round_number}. Runde im Turnier `{tournament.title}`: {new_pairings_message.jump_url}")
-                    except discord.Forbidden as forbidden:
-                        log.error(f"Could not send message to {user1.display_name} ({user1.id})")
-                if user2:
-                    try:
-                        p1_member = await tournament.get_member(match.player1.player_id)
-                        await user2.send(f"🤺 Du spielst gegen <@{match.player1.player_id}> ({p1_member.display_name}) in der {round.round_number}. Runde im Turnier `{tournament.title}`: {new_pairings_message.jump_url}")
-                    except discord.Forbidden as forbidden:
-                        log.error(f"Could not send message to {user2.display_name} ({user2.id})")
-
-    await use_custom_try("Nächste Runde Erstellen", do_the_thing, tournament)
+        # message players direcly, without holding up the interaction
+        notifications.run_in_background(notify_pairings(tournament, round, new_pairings_message, interaction))
+
+    async with tournament.lock:
+        await use_custom_try("Nächste Runde Erstellen", do_the_thing, tournament)
 
 
 class StartNextRoundView(discord.ui.View):
@@ -469,17 +522,15 @@ class StartNextRoundView(discord.ui.View):
             previous_standings_message = await self.tournament.get_message(self.previous_round.message_id_standings)
             previous_pairings_message = await self.tournament.get_message(self.previous_round.message_id_pairings)
 
-            standings_image = await self.tournament.standings_to_image(self.previous_round)
-            standings_file = discord.File(standings_image, filename=standings_image)
-            await previous_standings_message.edit(attachments=[], file=standings_file, view=None) #content=previous_pairings_message.content, view=None, attachments=previous_pairings_message.attachments)
+            standings_files = image_files(await self.tournament.standings_to_images(self.previous_round))
+            await previous_standings_message.edit(attachments=[], files=standings_files, view=None) #content=previous_pairings_message.content, view=None, attachments=previous_pairings_message.attachments)
 
-            pairings_image = await self.tournament.pairings_to_image(self.previous_round)
-            pairings_file = discord.File(pairings_image, filename=pairings_image)
-            await previous_pairings_message.edit(attachments=[], file=pairings_file, view=None)
+            pairings_files = image_files(await self.tournament.pairings_to_images(self.previous_round))
+            await previous_pairings_message.edit(attachments=[], files=pairings_files, view=None)
 
             try:
                 await next_round(self.tournament, interaction)
             except Exception as e:
-                await previous_standings_message.edit(attachments=[], file=standings_file, view=await StartNextRoundView.create(self.previous_round, self.tournament))
+                await previous_standings_message.edit(attachments=[], files=image_files(await self.tournament.standings_to_images(self.previous_round)), view=await StartNextRoundView.create(self.previous_round, self.tournament))
 
         await use_custom_try("Nächste Runde Erstellen", do_the_thing, self.tournament)
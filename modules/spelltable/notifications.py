@@ -0,0 +1,55 @@
+import asyncio
+import aiohttp
+import discord
+from ezcord import log
+
+# DMs open a channel per user and are rate limited per channel, a handful in parallel stays well within the limits
+DM_CONCURRENCY = 5
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 2 # seconds, doubled on every attempt
+
+# keeps references to fire-and-forget tasks, so they aren't garbage collected while running
+background_tasks:set[asyncio.Task] = set()
+
+def run_in_background(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+async def send_with_retry(user:discord.abc.Messageable, content:str) -> str|None:
+    """
+    Sends a DM, retrying server errors, rate limits and connection problems.
+    Returns None on success, otherwise the reason it failed.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            await user.send(content)
+            return None
+        except discord.Forbidden:
+            return "Direktnachrichten deaktiviert"
+        except discord.HTTPException as e:
+            transient = e.status == 429 or e.status >= 500
+            reason = f"{e.status} {e.text}"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            transient = True
+            reason = repr(e)
+        if not transient or attempt == MAX_ATTEMPTS - 1:
+            return reason
+        await asyncio.sleep(RETRY_DELAY * 2 ** attempt)
+
+async def send_direct_messages(messages:list[tuple[discord.Member, str]]) -> list[tuple[discord.Member, str]]:
+    """
+    Sends all messages concurrently, bounded by DM_CONCURRENCY. Returns the failed (member, reason) pairs.
+    """
+    semaphore = asyncio.Semaphore(DM_CONCURRENCY)
+
+    async def send(member:discord.Member, content:str):
+        async with semaphore:
+            reason = await send_with_retry(member, content)
+        if reason:
+            log.error(f"Could not send message to {member.display_name} ({member.id}): {reason}")
+        return member, reason
+
+    results = await asyncio.gather(*(send(member, content) for member, content in messages))
+    return [(member, reason) for member, reason in results if reason]
@@ -5,12 +5,16 @@ from ezcord import log
 import json
 import logging
 import traceback
+import hashlib
+import asyncio
+from io import BytesIO
 import discord
 from enum import StrEnum, auto
 from modules import swiss_mtg, table_to_image
 from modules.util.generate_calendar_image import generate_calendar
 from modules.serializable import Serializable
-from modules import env
+from modules import env, ics
+from modules.member_resolver import member_resolver
 import os
 import pytz
 
@@ -25,6 +29,16 @@ link_log = logging.getLogger("link_logger")
 
 test_participants = []
 TOURNAMENTS_FOLDER = "tournaments"
+CALENDAR_FILE_NAME = "calendar.png"
+OVERVIEW_UPDATE_DELAY = 10 # seconds
+
+# what the overview message and the bot presence currently show
+posted_calendar_hash:str|None = None
+posted_overview_text:str|None = None
+posted_activity_name:str|None = None
+overview_update_requested = False
+overview_update_task:asyncio.Task|None = None
+CALENDAR_UID_PREFIX = "spelltable-"
 
 if env.DEBUG:
     with open("test_participants.txt", "r", encoding="utf-8") as file:
@@ -130,35 +144,71 @@ async def update_tournament_message(bot:discord.Bot, trigger_guild:discord.Guild
     rr_tournaments:list["SpelltableTournament"] = [t for t in active_tournaments.values() if t.guild.id == guild.id]
     tourney_list_message = await generate_tournament_message(rr_tournaments)
     calendar_img = generate_calendar(rr_tournaments)
-    calendar_file = None
-    if calendar_img:
-        calendar_file = discord.File(calendar_img, filename=calendar_img)
-    calendar_message = None
-    if env.SPELLTABLE_CALENDAR_MESSAGE_ID:
-        channel:discord.TextChannel = guild.get_channel(env.SPELLTABLE_CALENDAR_CHANNEL_ID)
-        try:
-            calendar_message = await channel.fetch_message(env.SPELLTABLE_CALENDAR_MESSAGE_ID)
-        except discord.NotFound:
-            log.warning("Calendar message not found, creating a new one")
-
-    if calendar_message:
-        if calendar_file:
-            await calendar_message.edit(content=tourney_list_message, attachments=[], file=calendar_file)
-        else:
-            await calendar_message.edit(content=tourney_list_message, attachments=[])
+    calendar_hash = hashlib.sha1(calendar_img).hexdigest() if calendar_img else None
+    global posted_calendar_hash, posted_overview_text, posted_activity_name
+    if env.SPELLTABLE_CALENDAR_MESSAGE_ID and tourney_list_message == posted_overview_text and calendar_hash == posted_calendar_hash:
+        log.debug("Tournament overview unchanged")
     else:
-        if calendar_file:
-            calendar_message = await guild.get_channel(env.SPELLTABLE_CALENDAR_CHANNEL_ID).send(tourney_list_message, file=calendar_file)
+        calendar_file = None
+        if calendar_img:
+            calendar_file = discord.File(BytesIO(calendar_img), filename=CALENDAR_FILE_NAME)
+        calendar_message = None
+        if env.SPELLTABLE_CALENDAR_MESSAGE_ID:
+            channel:discord.TextChannel = guild.get_channel(env.SPELLTABLE_CALENDAR_CHANNEL_ID)
+            try:
+                calendar_message = await channel.fetch_message(env.SPELLTABLE_CALENDAR_MESSAGE_ID)
+            except discord.NotFound:
+                log.warning("Calendar message not found, creating a new one")
+
+        if calendar_message:
+            # the posted image is only known after it was uploaded once by this process
+            image_unchanged = calendar_hash == posted_calendar_hash and len(calendar_message.attachments) == (1 if calendar_img else 0)
+            if image_unchanged:
+                if calendar_message.content != tourney_list_message:
+                    await calendar_message.edit(content=tourney_list_message)
+            elif calendar_file:
+                await calendar_message.edit(content=tourney_list_message, attachments=[], file=calendar_file)
+            else:
+                await calendar_message.edit(content=tourney_list_message, attachments=[])
         else:
-            calendar_message = await guild.get_channel(env.SPELLTABLE_CALENDAR_CHANNEL_ID).send(tourney_list_message)
-        env.SPELLTABLE_CALENDAR_MESSAGE_ID = calendar_message.id
-        env.save_to_env("SPELLTABLE_CALENDAR_MESSAGE_ID", calendar_message.id)
-    link_log.info(f"Tournament Overview Message updated: {calendar_message.jump_url}")
+            if calendar_file:
+                calendar_message = await guild.get_channel(env.SPELLTABLE_CALENDAR_CHANNEL_ID).send(tourney_list_message, file=calendar_file)
+            else:
+                calendar_message = await guild.get_channel(env.SPELLTABLE_CALENDAR_CHANNEL_ID).send(tourney_list_message)
+            env.SPELLTABLE_CALENDAR_MESSAGE_ID = calendar_message.id
+            env.save_to_env("SPELLTABLE_CALENDAR_MESSAGE_ID", calendar_message.id)
+        posted_calendar_hash = calendar_hash
+        posted_overview_text = tourney_list_message
+        link_log.info(f"Tournament Overview Message updated: {calendar_message.jump_url}")
 
     tournament_count = len(rr_tournaments)
     activity_name = f"Veranstaltet {tournament_count} Turnier{'e' if tournament_count != 1 else ''}"
-    activity = discord.CustomActivity(name=activity_name)
-    await bot.change_presence(activity=activity)
+    if activity_name != posted_activity_name:
+        activity = discord.CustomActivity(name=activity_name)
+        await bot.change_presence(activity=activity)
+        posted_activity_name = activity_name
+
+def request_tournament_message_update(bot:discord.Bot, trigger_guild:discord.Guild|None = None):
+    """
+    Schedules an overview update in OVERVIEW_UPDATE_DELAY seconds. All requests until then are coalesced into it.
+    """
+    global overview_update_requested, overview_update_task
+    if trigger_guild and trigger_guild.id != env.GUILD_ID:
+        return  # Only update for the main guild
+    overview_update_requested = True
+    if not overview_update_task or overview_update_task.done():
+        overview_update_task = asyncio.create_task(run_overview_updates(bot))
+
+async def run_overview_updates(bot:discord.Bot):
+    global overview_update_requested
+    # requests that arrive while an update runs trigger one more round
+    while overview_update_requested:
+        await asyncio.sleep(OVERVIEW_UPDATE_DELAY)
+        overview_update_requested = False
+        try:
+            await update_tournament_message(bot)
+        except Exception:
+            log.error(f"Failed to update tournament overview: {traceback.format_exc()}")
 
 async def use_custom_try(purpose:str, func, tournament:"SpelltableTournament"):
     try:
@@ -173,6 +223,12 @@ async def use_custom_try(purpose:str, func, tournament:"SpelltableTournament"):
         await organizer.send(f"{error_str}\n```{short_tb}```")
         log.error(f"{error_str}\n```{short_tb}```")
 
+def image_files(images:list[str]) -> list[discord.File]:
+    """
+    Attachments for the pages of a rendered table.
+    """
+    return [discord.File(image, filename=image) for image in images]
+
 class SpelltableTournament(Serializable):
     def __init__(self, guild:discord.Guild, title:str, organizer_id:int, bot:discord.Bot):
         self.title = title
@@ -198,26 +254,42 @@ class SpelltableTournament(Serializable):
         self._organizer:discord.Member|None = None
         self._message:discord.Message|None = None
 
-        self.members:dict[int, discord.Member] = {}
-
-    async def get_member(self, user_id) -> discord.Member:
-        if user_id in self.members:
-            return self.members[user_id]
-        try:
-            user = await discord.utils.get_or_fetch(self.guild, "member", user_id)
-            self.members[user_id] = user
-            return user
-        except:
-            if env.DEBUG:
-                try:
-                    user = await discord.utils.get_or_fetch(self.bot, "user", user_id)
-                    return user
-                except discord.errors.NotFound: 
-                    return None
+        self.fallback_users:dict[int, discord.User|None] = {}
+        # round number -> player id -> (display name, pairing line), only for the latest rendered round
+        self.pairing_lines:dict[int, dict[int, tuple[str, str]]] = {}
+
+        # serializes everything that changes the swiss tournament or posts its results, not reentrant
+        self.lock = asyncio.Lock()
+        # round number -> ids of players whose pairing lines changed, None for all
+        self.pending_refresh:dict[int, set[int]|None] = {}
+        self.refresh_interaction:discord.Interaction|None = None
+        self.refresh_task:asyncio.Task|None = None
+
+    async def get_member(self, user_id) -> discord.Member|discord.User|None:
+        return (await self.get_members([user_id]))[user_id]
+
+    async def get_members(self, user_ids) -> dict[int, discord.Member|discord.User|None]:
+        """
+        Resolves several users at once through the guild-wide member resolver.
+        """
+        resolved:dict[int, discord.Member|discord.User|None] = await member_resolver.resolve(self.guild, user_ids)
+        for user_id, member in resolved.items():
+            if member is None:
+                resolved[user_id] = await self.get_fallback_user(user_id)
+        return resolved
+
+    async def get_fallback_user(self, user_id) -> discord.User|None:
+        # users that are no member of the guild (anymore) are only looked up once
+        if user_id in self.fallback_users:
+            return self.fallback_users[user_id]
+        if not env.DEBUG:
             link_log.error(f"User with ID {user_id} (<@{user_id}>) not found in guild {self.guild.id} for tournament {self.title}.")
-            user = await discord.utils.get_or_fetch(self.bot, "user", user_id)
-            self.members[user_id] = user
-            return user
+        try:
+            user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
+        except discord.errors.NotFound:
+            user = None
+        self.fallback_users[user_id] = user
+        return user
 
     @property
     async def organizer(self) -> discord.Member|None:
@@ -275,7 +347,8 @@ class SpelltableTournament(Serializable):
     @classmethod
     async def deserialize(cls, data, bot): #, organizer, message):
         organizer_id = int(data["organizer_id"])
-        guild = await bot.fetch_guild(data["guild_id"])
+        # the cached guild is connected to the gateway, so its members can be requested in bulk
+        guild = bot.get_guild(int(data["guild_id"])) or await bot.fetch_guild(data["guild_id"])
 
         tournament = cls(guild, data["name"], organizer_id, bot)
         tournament.description = data["description"]
@@ -398,24 +471,19 @@ class SpelltableTournament(Serializable):
 
         embed.add_field(name="\u200b", value="\u200b", inline=False)
 
-        await self.guild.chunk()
-
         participants = self.get_users_by_state(ParticipationState.PARTICIPATE)
-        participant_members:list[discord.User] = []
-        for uid in participants:
-            member = await self.get_member(uid)
-            if member:
-                participant_members.append(member)
+        members = await self.get_members(participants + waitlist + tentative)
+        participant_members:list[discord.User] = [members[uid] for uid in participants if members[uid]]
 
         participant_members.sort(key=lambda member: member.display_name.lower())
         embed.add_field(name=f"✅ Teilnehmer ({len(participants)}{f'/{self.max_participants}' if self.max_participants else ''})", value="\n".join([f"{p.display_name}" for p in participant_members]), inline=True)
         if self.max_participants:
-            waitlist_members = [await self.get_member(uid) for uid in waitlist]
+            waitlist_members = [members[uid] for uid in waitlist]
             # Filter out None values if some IDs weren't found
             waitlist_members = [m for m in waitlist_members if m is not None]
             embed.add_field(name=f"⌚ Nachrücker ({len(waitlist)})", value="\n".join([f"{p.display_name}" for p in waitlist_members]), inline=True)
         
-        tentative_members = [await self.get_member(uid) for uid in tentative]
+        tentative_members = [members[uid] for uid in tentative]
         # Filter out None values if some IDs weren't found
         tentative_members = [m for m in tentative_members if m is not None]
         embed.add_field(name=f"❓ Vielleicht ({len(tentative)})", value="\n".join([f"{p.display_name}" for p in tentative_members]), inline=True)
@@ -427,60 +495,75 @@ class SpelltableTournament(Serializable):
             return await tourney_message.channel.fetch_message(message_id)
         return None
 
-    async def update_pairings(self, round:swiss_mtg.Round):
+    async def update_pairings(self, round:swiss_mtg.Round, player_ids=None, save=True):
+        """
+        Re-renders the pairings image. player_ids are the players whose pairing lines changed, None rebuilds all lines.
+        """
         pairings_message:discord.Message = await self.get_message(round.message_id_pairings)
+        if not pairings_message:
+            raise Exception("Pairings message not found.")
         link_log.info(f"updating pairings {pairings_message.jump_url}")
-        pairings_image = await self.pairings_to_image(round)
-        pairings_file = discord.File(pairings_image, filename=pairings_image)
-        if pairings_message:
-            await pairings_message.edit(file=pairings_file, attachments=[], content=pairings_message.content or "Kein Inhalt verfügbar.")
+        pairings_files = image_files(await self.pairings_to_images(round))
+        content = await self.pairings_content(round, player_ids)
+        if content == pairings_message.content:
+            await pairings_message.edit(files=pairings_files, attachments=[])
         else:
-            raise Exception("Pairings message not found.")
+            await pairings_message.edit(files=pairings_files, attachments=[], content=content)
+
+        if save:
+            await self.save_tournament()
+
+    def build_pairing_lines(self, match:swiss_mtg.Match, members) -> dict[int, tuple[str, str]]:
+        """
+        (display name, line) for each player of the match
+        """
+        def mention(player:swiss_mtg.Player):
+            return f"~~<@{player.player_id}>~~" if player.dropped else f"<@{player.player_id}>"
+
+        if match.is_bye():
+            player = match.player1 or match.player2
+            if not player:
+                return {}
+            return {player.player_id: (members[player.player_id].display_name, f"{mention(player)} hat ein BYE")}
+
+        p1, p2 = match.player1, match.player2
+        if not (p1 and p2):
+            return {}
+        return {
+            p1.player_id: (members[p1.player_id].display_name, f"{mention(p1)} vs {mention(p2)}"),
+            p2.player_id: (members[p2.player_id].display_name, f"{mention(p2)} vs {mention(p1)}")
+        }
 
-        await self.save_tournament()
-    
-    async def get_pairings(self, round=None) -> str:
+    async def get_pairings(self, round=None, player_ids=None) -> str:
+        """
+        Lines are kept per round, with player_ids only the matches of these players are regenerated.
+        """
         if round is None:
             round = self.swiss_tournament.current_round()
 
-        matchups:dict[str, str] = {}
-        for match in round.matches:
-            # Handle BYE
-            if match.is_bye():
-                player = match.player1 or match.player2
-                if player:
-                    mention = f"<@{player.player_id}>"
-                    if player.dropped:
-                        mention = f"~~{mention}~~"
-                    player_member = await self.get_member(player.player_id)
-                    matchups[player_member.display_name] = f"{mention} hat ein BYE"
-                continue
+        lines = self.pairing_lines.get(round.round_number)
+        if lines is None or player_ids is None:
+            lines = {}
+            self.pairing_lines = {round.round_number: lines}
+            matches = round.matches
+        else:
+            changed = set(player_ids)
+            matches = [match for match in round.matches if any(player and player.player_id in changed for player in (match.player1, match.player2))]
 
-            # Normal match
-            p1, p2 = match.player1, match.player2
-            if not (p1 and p2):
-                continue
-            
-            mention_p1 = f"<@{p1.player_id}>"
-            if p1.dropped:
-                mention_p1 = f"~~{mention_p1}~~"
-            
-            mention_p2 = f"<@{p2.player_id}>"
-            if p2.dropped:
-                mention_p2 = f"~~{mention_p2}~~"
-            
-            player1_member = await self.get_member(p1.player_id)
-            player2_member = await self.get_member(p2.player_id)
-            matchups[player1_member.display_name] = f"{mention_p1} vs {mention_p2}"
-            matchups[player2_member.display_name] = f"{mention_p2} vs {mention_p1}"
+        match_player_ids = [player.player_id for match in matches for player in (match.player1, match.player2) if player]
+        members = await self.get_members(match_player_ids)
+        for match in matches:
+            lines.update(self.build_pairing_lines(match, members))
 
-        if not matchups:
+        if not lines:
             return "Keine Paarungen verfügbar. Ein Neustart des Bots, sollte den Fehler beheben. <@356120044754698252>" # pings NudelForce
 
-        for_message = "\n".join(matchups[player_name] for player_name in sorted(matchups, key=str.lower))
+        return "\n".join(line for _, line in sorted(lines.values(), key=lambda entry: entry[0].lower()))
+
+    async def pairings_content(self, round:swiss_mtg.Round, player_ids=None) -> str:
+        pairings = await self.get_pairings(round, player_ids)
+        return f"Paarungen für die {round.round_number}. Runde:\n\n{pairings}"
 
-        return for_message
-    
     async def save_tournament(self: "SpelltableTournament"):
         # Ensure the directory exists
         os.makedirs(TOURNAMENTS_FOLDER, exist_ok=True)
@@ -505,10 +588,28 @@ class SpelltableTournament(Serializable):
                 print(f"Tournament {tournament_id} has been concluded and moved to {concluded_path}")
         except Exception as e:
             print(f"Error saving tournament {tournament_id}: {e}")
-        await update_tournament_message(self.bot, trigger_guild=self.guild)
+        self.update_calendar_feed()
+        request_tournament_message_update(self.bot, trigger_guild=self.guild)
+
+    def calendar_uid(self) -> str:
+        return f"{CALENDAR_UID_PREFIX}{self.message_id}@radio-ravnica"
+
+    def update_calendar_feed(self):
+        concluded = (self.swiss_tournament and self.swiss_tournament.winner) or self.cancelled
+        if concluded or not self.time or not self.message_id:
+            ics.calendar_feed.remove_event(self.calendar_uid())
+            return
+        ics.calendar_feed.set_event(
+            self.calendar_uid(),
+            f"Spelltable: {self.title}",
+            self.time,
+            self.calc_end(),
+            description=self.description,
+            url=f"https://discord.com/channels/{self.guild.id}/{self.channel_id}/{self.message_id}"
+        )
 
 
-    async def standings_to_image(self, round=None) -> str:
+    async def standings_to_images(self, round=None) -> list[str]:
         if round is None:
             round = self.swiss_tournament.current_round()
         players = self.swiss_tournament.players
@@ -530,12 +631,10 @@ class SpelltableTournament(Serializable):
         }
         id = await self.get_id()
         filename = f'tmp/{id.replace("/", "_")}_standings_round_{round.round_number}.png'
-        table_to_image.generate_image(data, filename, "assets/beleren.ttf")
-
-        return filename
+        return table_to_image.generate_images(data, filename, "assets/beleren.ttf")
     
 
-    async def pairings_to_image(self, round:swiss_mtg.Round|None=None) -> str:
+    async def pairings_to_images(self, round:swiss_mtg.Round|None=None) -> list[str]:
         if round is None:
             round = self.swiss_tournament.current_round()
         id = await self.get_id()
@@ -578,5 +677,4 @@ class SpelltableTournament(Serializable):
         }
 
         filename = f'tmp/{id.replace("/", "_")}_pairings_round_{round.round_number}_expanded.png'
-        table_to_image.generate_image(data, filename, "assets/beleren.ttf")
-        return filename
\ No newline at end of file
+        return table_to_image.generate_images(data, filename, "assets/beleren.ttf")
\ No newline at end of file
@@ -1,87 +1,110 @@
+from functools import lru_cache
+import os
 from PIL import Image, ImageDraw, ImageFont
 
-def generate_image(data, filename, font_path="arial.ttf"):
-    # Load font (fallback to default if unavailable)
-    # try:
-    #     font = ImageFont.truetype("arial.ttf", 20)
-    # except IOError:
-    #     font = ImageFont.load_default()
+FONT_SIZE = 20
+PADDING = 10
+CELL_HEIGHT = 40
+CELL_TEXT_PADDING = 20
+ROWS_PER_PAGE = 50
+LEFT_ALIGNED_HEADERS = {"name", "spieler", "player", "spieler 1", "gegner", "spieler 2", "match ergebnis (s-n-u)"}
 
+@lru_cache(maxsize=None)
+def get_font(font_path:str, size:int=FONT_SIZE):
     try:
-        font = ImageFont.truetype(font_path, 20)
+        return ImageFont.truetype(font_path, size)
     except IOError:
         print(f"Warning: Couldn't load font '{font_path}', using default font.")
-        font = ImageFont.load_default()
-
-    padding = 10
-    cell_height = 40
-
-    num_columns = len(data["headers"])
-    num_rows = len(data["rows"]) + 1  # +1 for header row
-
-    # Calculate dynamic column widths
-    cell_widths = []
-    for col in range(num_columns):
-        # Collect all texts in this column (including header)
-        column_texts = [str(data["headers"][col])]
-        for row in data["rows"]:
-            value = row[col]
-            text = value[0] if isinstance(value, tuple) else str(value)
-            column_texts.append(text)
-
-        # Calculate max text width for this column
-        text_widths = [font.getbbox(text)[2] for text in column_texts]
-        max_width = max(text_widths) + 20  # Add padding
-        cell_widths.append(max_width)
-
-    # Calculate image size
-    img_width = sum(cell_widths) + 2 * padding
-    img_height = cell_height * num_rows + 2 * padding
-
-    # Create image
-    img = Image.new("RGB", (img_width, img_height), "white")
+        return ImageFont.load_default()
+
+@lru_cache(maxsize=4096)
+def text_width(font_path:str, text:str) -> int:
+    # player names and results repeat a lot, so each distinct string is only measured once
+    return int(get_font(font_path).getbbox(text)[2])
+
+def split_cell(value) -> tuple[str, bool]:
+    text, strike_through = value if isinstance(value, tuple) else (value, False)
+    return str(text), strike_through
+
+def column_widths(data, font_path:str) -> list[int]:
+    widths = [text_width(font_path, str(header)) for header in data["headers"]]
+    for row in data["rows"]:
+        for col, value in enumerate(row):
+            width = text_width(font_path, split_cell(value)[0])
+            if width > widths[col]:
+                widths[col] = width
+    return [width + CELL_TEXT_PADDING for width in widths]
+
+def render_page(headers, rows, cell_widths:list[int], font_path:str) -> Image.Image:
+    font = get_font(font_path)
+    table_width = sum(cell_widths)
+    table_height = CELL_HEIGHT * (len(rows) + 1)  # +1 for header row
+    img = Image.new("RGB", (table_width + 2 * PADDING, table_height + 2 * PADDING), "white")
     draw = ImageDraw.Draw(img)
 
-    # Function to draw a cell
-    def draw_cell(x, y, text, width, is_header=False, align="center", strike_through=False):
-        rect_x1, rect_y1 = x, y
-        rect_x2, rect_y2 = x + width, y + cell_height
-        draw.rectangle([rect_x1, rect_y1, rect_x2, rect_y2], outline="black", fill="lightgray" if is_header else "white")
-        
-        if align == "left":
-            text_x = x + 5
+    left, top = PADDING, PADDING
+    right, bottom = left + table_width, top + table_height
+    draw.rectangle([left, top, right, top + CELL_HEIGHT], fill="lightgray")
+
+    column_starts = []
+    x = left
+    for width in cell_widths:
+        column_starts.append(x)
+        x += width
+    left_aligned = [str(header).lower() in LEFT_ALIGNED_HEADERS for header in headers]
+
+    def draw_text(col, y, text, align_left, strike_through=False):
+        if align_left:
+            text_x = column_starts[col] + 5
             anchor = "lm"
         else:
-            text_x = x + width // 2
+            text_x = column_starts[col] + cell_widths[col] // 2
             anchor = "mm"
-        
-        text_y = y + cell_height // 2
+        text_y = y + CELL_HEIGHT // 2
         draw.text((text_x, text_y), text, fill="black", anchor=anchor, font=font)
 
         if strike_through:
-            text_width, _ = font.getbbox(text)[2:4]
-            line_y = text_y
-            line_x1 = text_x - (text_width // 2) if align == "center" else text_x
-            line_x2 = line_x1 + text_width
-            draw.line([(line_x1, line_y), (line_x2, line_y)], fill="red", width=2)
-
-    # Draw header row
-    y_offset = padding
-    x_offset = padding
-    for col, header in enumerate(data["headers"]):
-        draw_cell(x_offset, y_offset, str(header), cell_widths[col], is_header=True)
-        x_offset += cell_widths[col]
-
-    # Draw data rows
-    y_offset += cell_height
-    for row in data["rows"]:
-        x_offset = padding
+            width = text_width(font_path, text)
+            line_x1 = text_x if align_left else text_x - (width // 2)
+            draw.line([(line_x1, text_y), (line_x1 + width, text_y)], fill="red", width=2)
+
+    for col, header in enumerate(headers):
+        draw_text(col, top, str(header), align_left=False)
+
+    y = top + CELL_HEIGHT
+    for row in rows:
         for col, value in enumerate(row):
-            align = "left" if data["headers"][col].lower() in ["name", "spieler", "player", "spieler 1", "gegner", "spieler 2", "Match Ergebnis (S-N-U)".lower()] else "center"
-            text, strike_through = value if isinstance(value, tuple) else (value, False)
-            draw_cell(x_offset, y_offset, str(text), cell_widths[col], align=align, strike_through=strike_through)
-            x_offset += cell_widths[col]
-        y_offset += cell_height
-
-    # Save the image
-    img.save(filename)
+            text, strike_through = split_cell(value)
+            draw_text(col, y, text, left_aligned[col], strike_through)
+        y += CELL_HEIGHT
+
+    # grid as long lines instead of one rectangle per cell
+    for row_index in range(len(rows) + 2):
+        y = top + row_index * CELL_HEIGHT
+        draw.line([(left, y), (right, y)], fill="black")
+    for x in column_starts + [right]:
+        draw.line([(x, top), (x, bottom)], fill="black")
+
+    return img
+
+def generate_images(data, filename, font_path="arial.ttf", rows_per_page=ROWS_PER_PAGE) -> list[str]:
+    """
+    Renders the table into one image per rows_per_page rows, every page repeats the header.
+    All pages share the column widths. Returns the file names, a single page is saved as filename.
+    """
+    cell_widths = column_widths(data, font_path)
+    rows = data["rows"]
+    pages = [rows[i:i+rows_per_page] for i in range(0, len(rows), rows_per_page)] or [[]]
+
+    root, extension = os.path.splitext(filename)
+    filenames = []
+    for page_number, page_rows in enumerate(pages, start=1):
+        page_filename = filename if len(pages) == 1 else f"{root}_{page_number}{extension}"
+        render_page(data["headers"], page_rows, cell_widths, font_path).save(page_filename)
+        filenames.append(page_filename)
+    return filenames
+
+def generate_image(data, filename, font_path="arial.ttf"):
+    cell_widths = column_widths(data, font_path)
+    render_page(data["headers"], data["rows"], cell_widths, font_path).save(filename)
+    return filename
@@ -0,0 +1,21 @@
+import unittest
+from datetime import datetime
+from modules import ics
+
+class TestIcs(unittest.TestCase):
+
+    def test_event_without_start(self):
+        content = ics.create_ics_content("Modern Turnier", None, None, location="Laden").decode("utf-8")
+        self.assertIn("SUMMARY:Modern Turnier", content)
+        self.assertIn("LOCATION:Laden", content)
+        self.assertNotIn("DTSTART", content)
+        self.assertNotIn("DTEND", content)
+
+    def test_event_default_duration(self):
+        content = ics.create_ics_content("Modern Turnier", datetime(2025, 1, 10, 18, 0), None).decode("utf-8")
+        # 18:00 in Berlin is 17:00 UTC in winter
+        self.assertIn("DTSTART:20250110T170000Z", content)
+        self.assertIn("DTEND:20250110T180000Z", content)
+
+if __name__ == "__main__":
+    unittest.main()
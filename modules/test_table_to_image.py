@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+from PIL import Image
+from modules import table_to_image
+
+FONT_PATH = os.path.join(os.path.dirname(__file__), "..", "assets", "beleren.ttf")
+
+def create_table(row_count):
+    return {
+        "headers": ["Platz", "Spieler", "Punkte", "Match Ergebnis (S-N-U)"],
+        "rows": [
+            [i + 1, (f"Spieler {i % 64}", i % 7 == 0), (row_count - i) % 10, f"{i % 3}-{i % 2}-0"]
+            for i in range(row_count)
+        ]
+    }
+
+class TestTableToImage(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def test_single_image_size(self):
+        data = create_table(10)
+        filename = table_to_image.generate_image(data, os.path.join(self.tmp_dir.name, "table.png"), FONT_PATH)
+        with Image.open(filename) as img:
+            widths = table_to_image.column_widths(data, FONT_PATH)
+            self.assertEqual(img.size, (sum(widths) + 2 * table_to_image.PADDING, table_to_image.CELL_HEIGHT * 11 + 2 * table_to_image.PADDING))
+
+    def test_pagination(self):
+        data = create_table(120)
+        filenames = table_to_image.generate_images(data, os.path.join(self.tmp_dir.name, "table.png"), FONT_PATH, rows_per_page=50)
+        self.assertEqual(len(filenames), 3)
+        heights = []
+        for filename in filenames:
+            with Image.open(filename) as img:
+                heights.append(img.height)
+        # every page repeats the header
+        self.assertEqual(heights, [table_to_image.CELL_HEIGHT * (rows + 1) + 2 * table_to_image.PADDING for rows in (50, 50, 20)])
+
+    def test_row_counts(self):
+        max_height = table_to_image.CELL_HEIGHT * (table_to_image.ROWS_PER_PAGE + 1) + 2 * table_to_image.PADDING
+        for row_count in (10, 100, 500, 2000):
+            with self.subTest(rows=row_count):
+                data = create_table(row_count)
+                widths = table_to_image.column_widths(data, FONT_PATH)
+                filenames = table_to_image.generate_images(data, os.path.join(self.tmp_dir.name, f"table_{row_count}.png"), FONT_PATH)
+                self.assertEqual(len(filenames), -(-row_count // table_to_image.ROWS_PER_PAGE))
+
+                rendered_rows = 0
+                for filename in filenames:
+                    with Image.open(filename) as img:
+                        self.assertLessEqual(img.height, max_height)
+                        self.assertEqual(img.width, sum(widths) + 2 * table_to_image.PADDING)
+                        page_rows = (img.height - 2 * table_to_image.PADDING) // table_to_image.CELL_HEIGHT - 1
+                        # every row has its rank drawn inside the first cell
+                        for row in range(page_rows):
+                            top = table_to_image.PADDING + (row + 1) * table_to_image.CELL_HEIGHT
+                            cell = img.crop((table_to_image.PADDING + 2, top + 2, table_to_image.PADDING + widths[0] - 2, top + table_to_image.CELL_HEIGHT - 2))
+                            self.assertNotEqual(cell.convert("L").getextrema(), (255, 255))
+                        rendered_rows += page_rows
+                self.assertEqual(rendered_rows, row_count)
+
+if __name__ == "__main__":
+    unittest.main()
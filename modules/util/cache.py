@@ -0,0 +1,56 @@
+import json
+import os
+
+CACHE_FOLDER = "cache"
+
+def cache_path(*parts:str) -> str:
+    return os.path.join(CACHE_FOLDER, *parts)
+
+def load_json(file_path:str, default=None):
+    """
+    Loads a JSON cache file. Returns `default` if the file doesn't exist or is unreadable.
+    """
+    if not os.path.exists(file_path):
+        return default
+    try:
+        with open(file_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return default
+
+def save_json(file_path:str, data):
+    """
+    Writes a JSON cache file atomically, so a crash never leaves a half written cache behind.
+    """
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(data, file)
+    os.replace(tmp_path, file_path)
+
+def touch(file_path:str):
+    """
+    Marks a cached file as recently used.
+    """
+    os.utime(file_path, None)
+
+def enforce_quota(folder:str, max_bytes:int):
+    """
+    Deletes the least recently used files in folder until it fits into max_bytes.
+    """
+    if not os.path.isdir(folder):
+        return
+    files = []
+    for entry in os.scandir(folder):
+        if entry.is_file():
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
@@ -0,0 +1,174 @@
+from functools import lru_cache
+from PIL import Image, ImageDraw, ImageFont
+
+FONT_PATH = "assets/beleren.ttf"
+
+# sizes at scale 1
+CARD_WIDTH = 200
+CARD_HEIGHT = int(CARD_WIDTH * 1.4) # mtg card ratio
+H_SPACING = 10
+V_MARGIN = 10
+STACK_OVERLAP = 27  # Amount of vertical overlap between stacked cards
+STACK_OVERLAP_SIDEBOARD = STACK_OVERLAP * 2
+MAX_STACKED = 4 # more copies are shown as one card with a quantity label
+TITLE_MARGIN = 20
+TITLE_FONT_SIZE = 45
+QUANTITY_FONT_SIZE = 35
+SIDEBOARD_FONT_SIZE = 24
+SIDEBOARD_HEADER_SIZE = (140, 40)
+
+TEXT_COLOR = (255, 255, 255, 255)
+QUANTITY_COLOR = (255, 255, 0, 255)
+QUANTITY_BACKGROUND = (0, 0, 0, 180)
+
+@lru_cache(maxsize=None)
+def get_font(size:int) -> ImageFont.FreeTypeFont:
+    try:
+        return ImageFont.truetype(FONT_PATH, size)
+    except Exception:
+        return ImageFont.load_default()
+
+@lru_cache(maxsize=256)
+def render_text(text:str, size:int, color:tuple) -> Image.Image:
+    """
+    Renders text once onto a transparent image, so it can be pasted like ImageDraw.text would draw it at (0, 0).
+    """
+    font = get_font(size)
+    _, _, right, bottom = font.getbbox(text)
+    img = Image.new("RGBA", (max(1, right), max(1, bottom)), (0, 0, 0, 0))
+    ImageDraw.Draw(img).text((0, 0), text, font=font, fill=color)
+    return img
+
+@lru_cache(maxsize=256)
+def text_size(text:str, size:int) -> tuple[int, int]:
+    left, top, right, bottom = get_font(size).getbbox(text)
+    return right - left, bottom - top
+
+class DeckLayout:
+    """
+    Canvas size and an ordered list of drawing operations:
+    ("tile", key, x, y, visible_height), ("rect", box, color) and ("text", text, size, color, x, y).
+    """
+    def __init__(self, scale:float):
+        self.scale = scale
+        self.width = 0
+        self.height = 0
+        self.tile_size = (self.px(CARD_WIDTH), self.px(CARD_HEIGHT))
+        self.operations:list[tuple] = []
+
+    def px(self, value:float) -> int:
+        return round(value * self.scale)
+
+def compute_layout(stacks:list[tuple[str, int]], sideboard:list[tuple[str, int]], title:str, scale:float=1) -> DeckLayout:
+    """
+    Computes all positions of a deck preview. stacks and sideboard are (tile key, quantity) in display order.
+    """
+    layout = DeckLayout(scale)
+    px = layout.px
+    card_width, card_height = layout.tile_size
+    h_spacing, v_margin = px(H_SPACING), px(V_MARGIN)
+    overlap, overlap_sideboard = px(STACK_OVERLAP), px(STACK_OVERLAP_SIDEBOARD)
+
+    title_size = px(TITLE_FONT_SIZE)
+    title_width, title_height = text_size(title, title_size)
+    title_margin = px(TITLE_MARGIN)
+    title_area_height = title_height + 2 * title_margin
+
+    stacks_per_row = 6 if len(stacks) <= 24 else 10
+
+    def stack_height(quantity):
+        if quantity <= MAX_STACKED:
+            return card_height + (quantity - 1) * overlap if quantity > 0 else 0
+        return card_height
+
+    max_stack_height = max(stack_height(quantity) for _, quantity in stacks) if stacks else card_height
+    num_rows = (len(stacks) + stacks_per_row - 1) // stacks_per_row
+    row_height = v_margin * 2 + max_stack_height
+
+    sideboard_count = sum(quantity for _, quantity in sideboard)
+    header_width, header_height = px(SIDEBOARD_HEADER_SIZE[0]), px(SIDEBOARD_HEADER_SIZE[1])
+    sideboard_height = 0
+    if sideboard:
+        sideboard_height = header_height
+        if sideboard_count:
+            sideboard_height += card_height + (sideboard_count - 1) * overlap_sideboard
+
+    layout.width = h_spacing + (stacks_per_row + 1) * (card_width + h_spacing)
+    layout.height = max(
+        title_area_height + num_rows * row_height,
+        title_area_height + sideboard_height + v_margin * 2
+    )
+
+    layout.operations.append(("text", title, title_size, TEXT_COLOR, (layout.width - title_width) // 2, title_margin))
+
+    quantity_size = px(QUANTITY_FONT_SIZE)
+    for index, (key, quantity) in enumerate(stacks):
+        row = index // stacks_per_row
+        col = index % stacks_per_row
+        x = h_spacing + col * (card_width + h_spacing)
+        y = title_area_height + row * row_height
+
+        if quantity <= MAX_STACKED:
+            # Overlap the cards vertically, covered cards only show their top
+            for i in range(quantity):
+                visible_height = overlap if i < quantity - 1 else card_height
+                layout.operations.append(("tile", key, x, y + i * overlap, visible_height))
+        else:
+            # One card with the quantity written on it
+            layout.operations.append(("tile", key, x, y, card_height))
+            quantity_text = f"x{quantity}"
+            text_width, text_height = text_size(quantity_text, quantity_size)
+            text_x = x + card_width - text_width - px(8)
+            text_y = y + card_height // 2 - text_height - px(8)
+            box = (text_x - px(4), text_y - px(2), text_x + text_width + px(4), text_y + text_height + px(2))
+            layout.operations.append(("rect", box, QUANTITY_BACKGROUND))
+            layout.operations.append(("text", quantity_text, quantity_size, QUANTITY_COLOR, text_x, text_y))
+
+    # Sideboard to the right of the main deck stacks
+    if sideboard:
+        sideboard_x = h_spacing + stacks_per_row * (card_width + h_spacing)
+        sideboard_y = title_area_height + v_margin
+        header_size = px(SIDEBOARD_FONT_SIZE)
+        header_text_width, _ = text_size("Sideboard", header_size)
+        layout.operations.append(("text", "Sideboard", header_size, TEXT_COLOR, sideboard_x + (header_width - header_text_width) // 2, sideboard_y + px(4)))
+
+        y = sideboard_y + header_height
+        i = 0
+        for key, quantity in sideboard:
+            for _ in range(quantity):
+                visible_height = overlap_sideboard if i < sideboard_count - 1 else card_height
+                layout.operations.append(("tile", key, sideboard_x, y + i * overlap_sideboard, visible_height))
+                i += 1
+
+    return layout
+
+def render(layout:DeckLayout, tiles:dict[str, Image.Image]) -> Image.Image:
+    """
+    Draws the layout onto one canvas. tiles must already have layout.tile_size, missing tiles are left blank.
+    """
+    canvas = Image.new("RGB", (layout.width, layout.height))
+    draw = ImageDraw.Draw(canvas)
+    # covered cards of a stack share the same strip
+    strips:dict[tuple[str, int], Image.Image] = {}
+
+    for operation in layout.operations:
+        kind = operation[0]
+        if kind == "tile":
+            _, key, x, y, visible_height = operation
+            tile = tiles.get(key)
+            if tile is None:
+                continue
+            if visible_height < tile.height:
+                strip_key = (key, visible_height)
+                if strip_key not in strips:
+                    strips[strip_key] = tile.crop((0, 0, tile.width, visible_height))
+                tile = strips[strip_key]
+            canvas.paste(tile, (x, y))
+        elif kind == "rect":
+            _, box, color = operation
+            draw.rectangle(box, fill=color)
+        elif kind == "text":
+            _, text, size, color, x, y = operation
+            glyphs = render_text(text, size, color)
+            canvas.paste(glyphs, (x, y), glyphs)
+    return canvas
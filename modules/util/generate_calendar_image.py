@@ -1,4 +1,5 @@
 import os
+from io import BytesIO
 from PIL import Image, ImageDraw, ImageFont
 from datetime import date, datetime, timedelta
 import calendar
@@ -149,39 +150,16 @@ def rotated_text(text, draw:ImageDraw.ImageDraw, img:ImageDraw.Image.Image, x, y
     # Paste it onto the base image at desired position
     img.paste(rotated_text, (x, y), rotated_text)  # Third argument is mask for transparency
 
-def generate_calendar(tournaments: list["SpelltableTournament"] = []):
-    if not tournaments:
-        return None
-    tournaments = tournaments or []
-    tournaments.sort(key=lambda t: t.time)  # Sort tournaments by start time
+WEEKDAY_FONT = ImageFont.truetype(FONT_PATH, FONT_SIZE - 4)
 
-    today = datetime.now(tz=env.TIMEZONE).date()
-    earliest_date:date = min(tournaments[0].time.date(), today)
-    last_date:date = tournaments[-1].calc_end().date()
-
-    months:list[date] = []
-    current_date = earliest_date.replace(day=1)  # Start at the first day of the earliest month
-    while current_date <= last_date:
-        months.append(current_date)
-        next_month = current_date.month % 12 + 1
-        next_year = current_date.year + (current_date.month // 12)
-        current_date = current_date.replace(year=next_year, month=next_month)
-
-    img = Image.new("RGB", (1, 1), BG_COLOR)
-    draw = ImageDraw.Draw(img)
-    weekday_font = ImageFont.truetype(FONT_PATH, FONT_SIZE - 4)
-    wd_font_text_size = draw.textbbox((0, 0), "Mo", font=weekday_font)
-
-    max_width_months:int = 0
-    for month in months:
-        month_name = month.strftime("%B")
-        bbox = draw.textbbox((0, 0), month_name, font=FONT)
-        width:int = int(bbox[2])
-        if width > max_width_months:
-            max_width_months = width
-
-    max_width_months += 10 # Add some padding for the month name
+# strip key -> rendered month strip, only the strips of the last render are kept
+strip_cache:dict[tuple, Image.Image] = {}
 
+def assign_rows(tournaments:list["SpelltableTournament"]) -> dict[date, int]:
+    """
+    Assigns every tournament the first row that is free on its start day.
+    Returns the number of tournament rows per month.
+    """
     months_max_rows:dict[date, int] = defaultdict(int)
 
     occupancy:dict[date, dict[int, SpelltableTournament]] = {}
@@ -210,135 +188,100 @@ def generate_calendar(tournaments: list["SpelltableTournament"] = []):
                 occupancy[current_date] = {}
             occupancy[current_date][row] = tournament
             current_date += timedelta(days=1)
+    return months_max_rows
 
-    tournament_rows = sum(months_max_rows.values())
-    
-    # Calculate image dimensions
-    total_width:int = (MARGIN * 2 + COLUMN_WIDTH * DAYS_IN_MONTH) + max_width_months
-    total_height = MARGIN * 2 + HEADER_HEIGHT + ROW_HEIGHT * (tournament_rows + len(months))
+def render_month_strip(month:date, tournaments:list["SpelltableTournament"], rows:int, today:date|None, max_width_months:int, total_width:int) -> Image.Image:
+    """
+    Renders the weekday row and the tournament rows of one month, including its top grid line.
+    """
+    row_height = ROW_HEIGHT * rows
+    strip = Image.new("RGB", (total_width, ROW_HEIGHT + row_height), BG_COLOR)
+    draw = ImageDraw.Draw(strip)
 
-    # Resize the image to fit the calendar
-    img = img.resize((total_width, total_height))
-    draw = ImageDraw.Draw(img)
+    # Draw the month name
+    month_name = get_german_month_name(month.month)
+    draw.text((MARGIN, row_height / 2 + 2), month_name, fill=TEXT_COLOR, font=FONT)
+
+    days_in_month = calendar.monthrange(month.year, month.month)[1]
+    title_positions = []
 
-    # Draw the header row (days of the month)
+    # Draw each day in the month
     for day in range(1, DAYS_IN_MONTH + 1):
         x_offset = MARGIN + max_width_months + (day - 1) * COLUMN_WIDTH
-        draw.text((x_offset + 5, MARGIN-10), f"{day:2}", fill=TEXT_COLOR, font=FONT)
 
-    previous_offset = 0
+        # Check if the day exists in the current month
+        if day > days_in_month:
+            draw.rectangle(
+                [x_offset, 0, x_offset + COLUMN_WIDTH, row_height],
+                fill="#d3d3d3",  # Light gray color
+            )
+            continue
 
-    # Draw each month row
-    for month_idx, month in enumerate(months, start=1):
-        row_height = ROW_HEIGHT * (months_max_rows[month.replace(day=1)])
-        y_offset = MARGIN + HEADER_HEIGHT + (month_idx - 1) * ROW_HEIGHT - 10 + previous_offset
-        previous_offset += row_height
+        current_day = date(month.year, month.month, day)
 
-        # Draw the month name
-        month_name = get_german_month_name(month.month)
-        draw.text((MARGIN, y_offset + row_height / 2 + 2), month_name, fill=TEXT_COLOR, font=FONT)
+        # Highlight weekends
+        if current_day.weekday() >= 5:  # Saturday or Sunday
+            draw.rectangle(
+                [x_offset, 0, x_offset + COLUMN_WIDTH, ROW_HEIGHT],
+                fill=WEEKEND_COLOR,
+            )
         
-        if month_idx == 1 or month.month == 1:
-            rotated_text(str(month.year), draw, img, 20, y_offset + ROW_HEIGHT)
-
-        # Track occupied rows for each day in the month
-        days_in_month = calendar.monthrange(month.year, month.month)[1]
+        if current_day == today:
+            draw.rectangle(
+                [x_offset, 0, x_offset + COLUMN_WIDTH, ROW_HEIGHT],
+                fill=TODAY_COLOR,
+            )
 
-        # Draw each day in the month
-        for day in range(1, DAYS_IN_MONTH + 1):
-            x_offset = MARGIN + max_width_months + (day - 1) * COLUMN_WIDTH
+        # Add the first two letters of the weekday in the top-left corner of the cell
+        weekday_abbr = get_german_weekday_name(current_day.weekday())[:2]
+        draw.text(
+            (x_offset + 2, 2),
+            f"{current_day.day} {weekday_abbr}",
+            fill=TEXT_COLOR if current_day != today else "white",
+            font=WEEKDAY_FONT,
+        )
 
-            # Check if the day exists in the current month
-            if day > days_in_month:
-                draw.rectangle(
-                    [x_offset, y_offset, x_offset + COLUMN_WIDTH, y_offset + row_height],
-                    fill="#d3d3d3",  # Light gray color
-                )
-                continue
+        # Check if the current day is part of any tournament
+        for tournament in tournaments:
+            start_date = tournament.time.date()
+            end_date = tournament.calc_end().date()
 
-            current_day = date(month.year, month.month, day)
+            if start_date <= current_day <= end_date:
+                # Calculate the y-offset for the tournament
+                title_y_offset = ROW_HEIGHT * tournament.row
 
-            # Highlight weekends
-            if current_day.weekday() >= 5:  # Saturday or Sunday
-                draw.rectangle(
-                    [x_offset, y_offset, x_offset + COLUMN_WIDTH, y_offset + ROW_HEIGHT],
-                    fill=WEEKEND_COLOR,
+                # Highlight the tournament range
+                highlight_color = (
+                    DARKER_HIGHLIGHT_COLOR if current_day.weekday() >= 5 else HIGHLIGHT_COLOR
                 )
-            
-            if current_day == datetime.now(tz=env.TIMEZONE).date():
                 draw.rectangle(
-                    [x_offset, y_offset, x_offset + COLUMN_WIDTH, y_offset + ROW_HEIGHT],
-                    fill=TODAY_COLOR,
+                    [
+                        x_offset,
+                        title_y_offset,
+                        x_offset + COLUMN_WIDTH,
+                        title_y_offset + ROW_HEIGHT,
+                    ],
+                    fill=highlight_color,
                 )
+                draw_dashed_line(draw, (x_offset, title_y_offset), (x_offset + COLUMN_WIDTH, title_y_offset))
 
-            # Add the first two letters of the weekday in the top-left corner of the cell
-            weekday_abbr = get_german_weekday_name(current_day.weekday())[:2]
-            draw.text(
-                (x_offset + 2, y_offset + 2),
-                f"{current_day.day} {weekday_abbr}",
-                fill=TEXT_COLOR if current_day != datetime.now(tz=env.TIMEZONE).date() else "white",
-                font=weekday_font,
-            )
-
-            # Check if the current day is part of any tournament
-            for tournament in tournaments:
-                start_date = tournament.time.date()
-                end_date = tournament.calc_end().date()
-
-                if start_date <= current_day <= end_date:
-                    # Calculate the y-offset for the tournament
-                    title_y_offset = y_offset + ROW_HEIGHT * tournament.row
-
-                    # Highlight the tournament range
-                    highlight_color = (
-                        DARKER_HIGHLIGHT_COLOR if current_day.weekday() >= 5 else HIGHLIGHT_COLOR
-                    )
-                    draw.rectangle(
-                        [
-                            x_offset,
-                            title_y_offset,
-                            x_offset + COLUMN_WIDTH,
-                            title_y_offset + ROW_HEIGHT,
-                        ],
-                        fill=highlight_color,
-                    )
-                    draw_dashed_line(draw, (x_offset, title_y_offset), (x_offset + COLUMN_WIDTH, title_y_offset))
-                    title_x_offset = x_offset + 5  # Add padding inside the cell
-
-                    # Add the event title on the first day of the event
-                    if current_day == start_date:
-                        # Ensure the title is drawn after the highlight
-                        tournament.title_x_offset = title_x_offset  # Add padding inside the cell
-                        tournament.title_y_offset = title_y_offset  # Add padding from the top
+                # Add the event title on the first day of the event, after the grid is drawn
+                if current_day == start_date:
+                    title_positions.append((tournament.title, x_offset + 5, title_y_offset))
 
     # Draw grid lines
     for day in range(DAYS_IN_MONTH + 1):  # Vertical lines
         x = MARGIN + max_width_months + day * COLUMN_WIDTH
-        draw.line([(x, MARGIN-10), (x, total_height - MARGIN-10)], fill=TEXT_COLOR, width=1)
-
-    y = MARGIN + HEADER_HEIGHT - 10
-    draw.line([(MARGIN-40, y), (total_width - MARGIN, y)], fill=TEXT_COLOR, width=1)
-    previous_offset = 0
-    for month_idx, month in enumerate(months):  # Horizontal lines
-        new_year_offset = 0
-        if month.month == 12:
-            new_year_offset = -40
-        row_height = ROW_HEIGHT * (months_max_rows[month.replace(day=1)])
-        y = MARGIN + HEADER_HEIGHT + ROW_HEIGHT * (month_idx+1) + row_height + previous_offset - 10
-        previous_offset += row_height
-        draw.line([(MARGIN+new_year_offset, y), (total_width - MARGIN, y)], fill=TEXT_COLOR, width=1)
+        draw.line([(x, 0), (x, strip.height)], fill=TEXT_COLOR, width=1)
+    draw.line([(MARGIN, 0), (total_width - MARGIN, 0)], fill=TEXT_COLOR, width=1)
 
     # draw tournament stuff
     outline_color = "white"
     glow_offset_size = 1
     y_text_offset = 4
     glow_offset = [(-glow_offset_size, -glow_offset_size), (-glow_offset_size, glow_offset_size), (glow_offset_size, -glow_offset_size), (glow_offset_size, glow_offset_size)]  # Offsets for the outline
-    for tournament in tournaments:
-        title = tournament.title
-        title_x_offset = tournament.title_x_offset
-        title_y_offset = tournament.title_y_offset
-
-        wd_font_text_size = draw.textbbox((0, 0), title, font=weekday_font)
+    for title, title_x_offset, title_y_offset in title_positions:
+        wd_font_text_size = draw.textbbox((0, 0), title, font=WEEKDAY_FONT)
         text_length = wd_font_text_size[2] - wd_font_text_size[0]
         
         # override grid behind text
@@ -355,25 +298,100 @@ def generate_calendar(tournaments: list["SpelltableTournament"] = []):
                 (title_x_offset + x_offset, title_y_offset + y_offset + y_text_offset),
                 title,
                 fill=outline_color,
-                font=weekday_font,
+                font=WEEKDAY_FONT,
             )
 
-
         draw.text(
             (title_x_offset, title_y_offset+y_text_offset),
             title,
             fill=TEXT_COLOR,
-            font=weekday_font,
+            font=WEEKDAY_FONT,
         )
 
         draw_dashed_line(draw, (title_x_offset-5, title_y_offset), (title_x_offset+text_length, title_y_offset))
 
-    # Save the image to the tmp/ directory
-    os.makedirs("tmp", exist_ok=True)  # Ensure the tmp/ directory exists
-    file_path = f"tmp/calendar.png"
-    img.save(file_path)
+    return strip
+
+def generate_calendar(tournaments: list["SpelltableTournament"] = []) -> bytes|None:
+    """
+    Renders the calendar as PNG. Every month is a strip that is only re-rendered when
+    its tournaments, its row count, the highlighted day or the image width changed.
+    """
+    global strip_cache
+    if not tournaments:
+        return None
+    tournaments = tournaments or []
+    tournaments.sort(key=lambda t: t.time)  # Sort tournaments by start time
+
+    today = datetime.now(tz=env.TIMEZONE).date()
+    earliest_date:date = min(tournaments[0].time.date(), today)
+    last_date:date = tournaments[-1].calc_end().date()
+    months:list[date] = get_months_between(earliest_date, last_date)
+
+    measure = ImageDraw.Draw(Image.new("RGB", (1, 1), BG_COLOR))
+    max_width_months:int = 0
+    for month in months:
+        month_name = month.strftime("%B")
+        bbox = measure.textbbox((0, 0), month_name, font=FONT)
+        width:int = int(bbox[2])
+        if width > max_width_months:
+            max_width_months = width
+
+    max_width_months += 10 # Add some padding for the month name
+
+    months_max_rows = assign_rows(tournaments)
+    tournament_rows = sum(months_max_rows[month] for month in months)
+    
+    # Calculate image dimensions
+    total_width:int = (MARGIN * 2 + COLUMN_WIDTH * DAYS_IN_MONTH) + max_width_months
+    total_height = MARGIN * 2 + HEADER_HEIGHT + ROW_HEIGHT * (tournament_rows + len(months))
+
+    img = Image.new("RGB", (total_width, total_height), BG_COLOR)
+    draw = ImageDraw.Draw(img)
+
+    # Draw the header row (days of the month) and its part of the vertical grid lines
+    for day in range(1, DAYS_IN_MONTH + 1):
+        x_offset = MARGIN + max_width_months + (day - 1) * COLUMN_WIDTH
+        draw.text((x_offset + 5, MARGIN-10), f"{day:2}", fill=TEXT_COLOR, font=FONT)
+    for day in range(DAYS_IN_MONTH + 1):
+        x = MARGIN + max_width_months + day * COLUMN_WIDTH
+        draw.line([(x, MARGIN-10), (x, MARGIN + HEADER_HEIGHT - 10)], fill=TEXT_COLOR, width=1)
+
+    used_strips:dict[tuple, Image.Image] = {}
+    year_labels:list[tuple[int, int]] = []
+    y_offset = MARGIN + HEADER_HEIGHT - 10
+    for month_idx, month in enumerate(months):
+        days_in_month = calendar.monthrange(month.year, month.month)[1]
+        month_end = month.replace(day=days_in_month)
+        month_tournaments = [t for t in tournaments if t.time.date() <= month_end and t.calc_end().date() >= month]
+        month_today = today if month.year == today.year and month.month == today.month else None
+        rows = months_max_rows[month]
+        key = (
+            month,
+            rows,
+            tuple((t.title, t.time.date(), t.calc_end().date(), t.row) for t in month_tournaments),
+            month_today,
+            max_width_months,
+            total_width,
+        )
+        strip = strip_cache.get(key) or render_month_strip(month, month_tournaments, rows, month_today, max_width_months, total_width)
+        used_strips[key] = strip
+        img.paste(strip, (0, y_offset))
+
+        if month_idx == 0 or month.month == 1:
+            year_labels.append((month.year, y_offset))
+        y_offset += strip.height
+    strip_cache = used_strips
+
+    # bottom line, the line below December starts further left to mark the new year
+    draw.line([(MARGIN - 40 if months[-1].month == 12 else MARGIN, y_offset), (total_width - MARGIN, y_offset)], fill=TEXT_COLOR, width=1)
+    for year, label_y_offset in year_labels:
+        rotated_text(str(year), draw, img, 20, label_y_offset + ROW_HEIGHT)
+        draw.line([(MARGIN - 40, label_y_offset), (MARGIN, label_y_offset)], fill=TEXT_COLOR, width=1)
 
-    return file_path
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
 
 if __name__ == "__main__":
     class SpelltableTournament():
@@ -401,5 +419,7 @@ if __name__ == "__main__":
         SpelltableTournament("Turnier nächstes Jahr", datetime(2026, 2, 17)),
     ]
 
-    calendar_new = generate_calendar(tournaments)
-    print(f"Calendar saved at: {calendar_new}")
+    os.makedirs("tmp", exist_ok=True)
+    with open("tmp/calendar.png", "wb") as file:
+        file.write(generate_calendar(tournaments))
+    print("Calendar saved at: tmp/calendar.png")
@@ -0,0 +1,42 @@
+from io import BytesIO
+import math
+from PIL import Image
+
+DISCORD_MAX_FILE_BYTES = 10 * 1024 * 1024
+LOSSY_QUALITY = 85
+WEBP_MAX_DIMENSION = 16383
+# leaves some headroom, because the size after downscaling is only estimated
+DOWNSCALE_HEADROOM = 0.9
+
+def encode(img:Image.Image, format:str, **params) -> bytes:
+    buffer = BytesIO()
+    img.save(buffer, format=format, **params)
+    return buffer.getvalue()
+
+def encode_lossy(img:Image.Image) -> tuple[bytes, str]:
+    if max(img.size) <= WEBP_MAX_DIMENSION:
+        return encode(img, "WEBP", quality=LOSSY_QUALITY, method=4), "webp"
+    return encode(img.convert("RGB"), "JPEG", quality=LOSSY_QUALITY, optimize=True), "jpg"
+
+def encode_image(img:Image.Image, max_bytes:int=DISCORD_MAX_FILE_BYTES) -> tuple[bytes, str]:
+    """
+    Encodes img to fit into max_bytes. Returns the encoded bytes and the file extension.
+    Tries lossless PNG first (as palette image if it has few colors), then a lossy format,
+    and downscales at most once, by a factor computed from the lossy size.
+    """
+    if img.getcolors(256) is not None:
+        # few colors, so a palette image is lossless and much smaller
+        content = encode(img.quantize(colors=256, dither=Image.Dither.NONE), "PNG", optimize=True)
+    else:
+        content = encode(img, "PNG")
+    if len(content) <= max_bytes:
+        return content, "png"
+
+    content, extension = encode_lossy(img)
+    if len(content) <= max_bytes:
+        return content, extension
+
+    # encoded size scales roughly with the pixel count
+    scale = math.sqrt(max_bytes / len(content) * DOWNSCALE_HEADROOM)
+    resized = img.resize((max(1, int(img.width * scale)), max(1, int(img.height * scale))), Image.LANCZOS)
+    return encode_lossy(resized)
@@ -0,0 +1,126 @@
+import asyncio
+import re
+import aiohttp
+from ezcord import log
+import xml.etree.ElementTree as ET
+from modules import env
+from modules.util import cache
+
+FEED_URL = "https://www.youtube.com/feeds/videos.xml"
+CHANNEL_PAGE_URL = "https://www.youtube.com"
+# skips the cookie consent page youtube shows to european visitors
+CONSENT_COOKIES = {"SOCS": "CAI", "CONSENT": "YES+"}
+CHANNEL_ID_REGEX = re.compile(r'<link rel="canonical" href="https://www\.youtube\.com/channel/(UC[\w-]{22})"|"externalId":"(UC[\w-]{22})"')
+API_URL = "https://www.googleapis.com/youtube/v3"
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=15)
+CHANNEL_IDS_FILE = cache.cache_path("youtube", "channel_ids.json")
+NAMESPACES = {
+    "atom": "http://www.w3.org/2005/Atom",
+    "yt": "http://www.youtube.com/xml/schemas/2015"
+}
+
+# handle -> channel id, they never change
+channel_ids:dict[str, str] = cache.load_json(CHANNEL_IDS_FILE, {})
+
+def create_session() -> aiohttp.ClientSession:
+    return aiohttp.ClientSession(timeout=REQUEST_TIMEOUT)
+
+async def api_get(session:aiohttp.ClientSession, endpoint:str, params:dict) -> dict:
+    if not env.API_KEY_YOUTUBE:
+        raise Exception(".env/API_KEY_YOUTUBE not defined")
+    async with session.get(f"{API_URL}/{endpoint}", params={**params, "key": env.API_KEY_YOUTUBE}) as response:
+        response.raise_for_status()
+        return await response.json()
+
+async def channel_id_from_page(session:aiohttp.ClientSession, handle:str) -> str|None:
+    async with session.get(f"{CHANNEL_PAGE_URL}/{handle}", cookies=CONSENT_COOKIES) as response:
+        response.raise_for_status()
+        html = await response.text()
+    match = CHANNEL_ID_REGEX.search(html)
+    return (match.group(1) or match.group(2)) if match else None
+
+async def channel_id_from_api(session:aiohttp.ClientSession, handle:str) -> str|None:
+    data = await api_get(session, "channels", {"part": "id", "forHandle": handle})
+    items = data.get("items")
+    return items[0]["id"] if items else None
+
+async def resolve_channel_id(session:aiohttp.ClientSession, handle:str) -> str:
+    """
+    Reads the channel id from the handle's channel page, the Data API is only asked if that fails and a key is set.
+    """
+    if handle in channel_ids:
+        return channel_ids[handle]
+    try:
+        channel_id = await channel_id_from_page(session, handle)
+    except aiohttp.ClientError as e:
+        log.warning(f"Could not load the channel page of {handle}: {e}")
+        channel_id = None
+    if not channel_id and env.API_KEY_YOUTUBE:
+        channel_id = await channel_id_from_api(session, handle)
+    if not channel_id:
+        raise ValueError(f"No YouTube channel found for handle {handle}")
+    channel_ids[handle] = channel_id
+    cache.save_json(CHANNEL_IDS_FILE, channel_ids)
+    return channel_id
+
+def parse_feed(xml_data:bytes) -> list[dict]:
+    """
+    Entries of a channel's Atom feed, newest first.
+    """
+    root = ET.fromstring(xml_data)
+    entries = []
+    for entry in root.findall("atom:entry", NAMESPACES):
+        link = entry.find("atom:link", NAMESPACES)
+        entries.append({
+            "videoId": entry.findtext("yt:videoId", namespaces=NAMESPACES),
+            "title": entry.findtext("atom:title", namespaces=NAMESPACES),
+            "published": entry.findtext("atom:published", namespaces=NAMESPACES),
+            "url": link.get("href") if link is not None else None
+        })
+    return entries
+
+class ChannelFeed:
+    """
+    The Atom feed of a channel with its 15 latest uploads, streams included.
+    It is requested conditionally, an unchanged feed costs a 304 without body.
+    """
+    def __init__(self, handle:str, channel_id:str|None=None):
+        self.handle = handle
+        self.channel_id = channel_id
+        self.etag:str|None = None
+        self.last_modified:str|None = None
+        self.entries:list[dict] = []
+
+    async def fetch(self, session:aiohttp.ClientSession) -> list[dict]:
+        channel_id = self.channel_id or await resolve_channel_id(session, self.handle)
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        async with session.get(FEED_URL, params={"channel_id": channel_id}, headers=headers) as response:
+            if response.status == 304:
+                return self.entries
+            response.raise_for_status()
+            xml_data = await response.read()
+            self.etag = response.headers.get("ETag")
+            self.last_modified = response.headers.get("Last-Modified")
+
+        self.entries = await asyncio.to_thread(parse_feed, xml_data)
+        return self.entries
+
+async def get_live_streaming_details(session:aiohttp.ClientSession, video_ids:list[str]) -> dict[str, dict]:
+    """
+    liveStreamingDetails of the videos that are streams, up to 50 ids per request.
+    Without API_KEY_YOUTUBE streams can't be told apart and nothing is returned.
+    """
+    details = {}
+    if not env.API_KEY_YOUTUBE:
+        return details
+    for i in range(0, len(video_ids), 50):
+        data = await api_get(session, "videos", {"part": "liveStreamingDetails", "id": ",".join(video_ids[i:i+50])})
+        for item in data.get("items", []):
+            if "liveStreamingDetails" in item:
+                details[item["id"]] = item["liveStreamingDetails"]
+    return details